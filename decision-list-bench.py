@@ -0,0 +1,256 @@
+"""
+== OVERALL ==
+This program benchmarks every stage of the training, testing and evaluation programs on a synthetic corpus,
+and can compare the results to a stored baseline to catch a stage that got slower.
+
+== EXAMPLE ==
+python3 decision-list-bench.py --reviews 10000 --output bench.json
+python3 decision-list-bench.py --reviews 10000 --baseline bench.json --threshold 0.25
+
+> OUTPUT <
+stage                      seconds   reviews/sec    tokens/sec  peak RSS MB
+splitData                    0.041      243902.4   146341463.4         38.1
+tokenData                    0.298       33557.0    20134228.2         38.1
+...
+
+== ALGORITHM ==
+Generate a training file (filename label tokens...), a test file (filename __ tokens...) and the gold answers,
+with words drawn from a zipf-like vocabulary and positive and negative reviews leaning on different words.
+Run each stage on the output of the stage before it and time it:
+splitData, tokenData, notHandling, ngrams, getNgramCounts, createDecisionList, createDecisionListNumpy,
+writeListToFile (training), openList, testPreProcess, classify (testing) and evaluate (evaluation).
+The reviews stream through the preprocessing stages one at a time like in the programs, so memory stays flat however
+many reviews there are, and each stage is timed for its own work on every review (sentiment.profiling).
+createDecisionList classifies, scores and sorts the rules in plain Python, createDecisionListNumpy the way the trainer
+does when NumPy is installed (sentiment.scoring), and is left out without NumPy.
+Record the reviews and tokens per second and the peak RSS of the process after the stage.
+Write the results as JSON, and if a baseline is given fail when a stage's reviews/sec dropped by more than the threshold.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+from sentiment import preprocess, profiling, scoring
+from sentiment.classifier import openList
+from sentiment.counts import getNgramCounts, bundleData
+from sentiment.training import countLength, scoreCounts, writeSortedList
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def loadScript(filename):
+    """
+    Import one of the decision-list-*.py programs, their names are not valid module names.
+    """
+
+    name = filename[:-3].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HERE, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+def generateCorpus(directory, reviews, reviewLength, vocabSize, seed):
+    """
+    Write a synthetic train file, test file and gold file to directory and return their paths.
+    """
+
+    rng = random.Random(seed)
+
+    vocab = ["w{}".format(i) for i in range(vocabSize)]
+    vocab[1:8] = [".", ",", "the", "not", "!", "(", "'s"]   # Some of the tokens the not handling cares about, near the top.
+    weights = [1 / (rank + 1) for rank in range(vocabSize)] # Zipf-like, a few very common words and a long tail.
+
+    half = vocabSize // 2
+    posWeights = [weight * (1.5 if 10 <= rank < half else 1.0) for rank, weight in enumerate(weights)] # Positive reviews lean on the first half,
+    negWeights = [weight * (1.5 if rank >= half else 1.0) for rank, weight in enumerate(weights)]   # negative reviews on the second half.
+
+    paths = {name: os.path.join(directory, "sentiment-{}.txt".format(name)) for name in ("train", "test", "gold")}
+
+    with open(paths["train"], "w") as train, open(paths["test"], "w") as test, open(paths["gold"], "w") as gold:
+        for i in range(reviews):
+            for f, prefix in ((train, "tr"), (test, "te")):
+                label = rng.randint(0, 1)
+                words = rng.choices(vocab, weights=posWeights if label else negWeights, k=reviewLength)
+                filename = "cv{}_{}.txt".format(i, prefix)
+
+                if f is train:
+                    f.write("{} {} {}\n".format(filename, label, " ".join(words)))
+                else:
+                    f.write("{} __ {}\n".format(filename, " ".join(words)))
+                    gold.write("{} {}\n".format(filename, label))
+
+    return paths
+
+def peakRss():
+    """
+    Peak resident set size of this process so far, in MB.
+    """
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024   # bytes on macOS, KB on Linux
+
+def runStages(paths, reviews, reviewLength):
+    """
+    Run and time every stage, returns {stage: result}.
+    """
+
+    test = loadScript("decision-list-test.py")
+    evaluation = loadScript("decision-list-eval.py")
+
+    tokens = reviews * reviewLength
+    results = {}
+
+    def record(stage, seconds):
+        results[stage] = {
+            "seconds": seconds,
+            "reviews_per_sec": reviews / seconds if seconds else None,
+            "tokens_per_sec": tokens / seconds if seconds else None,
+            "peak_rss_mb": peakRss(),
+        }
+
+    def timed(stage, function, *args):
+        start = time.perf_counter()
+        value = function(*args)
+        record(stage, time.perf_counter() - start)
+        return value
+
+    def streamed(stages, function):
+        """
+        Run function with the profiler on and record the time each of the stages spent on its own work,
+        the reviews go through all of them one at a time.
+        """
+
+        profiling.PROFILER.stages.clear()
+        profiling.PROFILER.enabled = True   # Without tracemalloc, it would slow every stage down.
+        try:
+            value = function()
+        finally:
+            profiling.PROFILER.enabled = False
+
+        for stage in stages:
+            record(stage, profiling.PROFILER.stages[stage]["self_seconds"])
+
+        return value
+
+    def countTraining():
+        lines = profiling.iterate("splitData", preprocess.splitData(paths["train"]))
+        tokenList = profiling.iterate("tokenData", preprocess.tokenData(lines, preprocess.TRAIN))
+        notHandled = profiling.iterate("notHandling", preprocess.notHandling(tokenList))
+        corpus = profiling.iterate("ngrams", preprocess.ngrams(notHandled))
+
+        with profiling.stage("getNgramCounts"):
+            return getNgramCounts(bundleData(corpus))
+
+    ngrams = streamed(["splitData", "tokenData", "notHandling", "ngrams", "getNgramCounts"], countTraining)
+
+    reviewVocab = ngrams.vocabulary(sort=True)
+    lengths = {"pos": countLength("pos", ngrams), "neg": countLength("neg", ngrams)}
+
+    rows = timed("createDecisionList", scoreCounts, ngrams, reviewVocab, lengths, 1, False)
+
+    if scoring.numpy is not None:
+        rows = timed("createDecisionListNumpy", scoreCounts, ngrams, reviewVocab, lengths, 1, True)   # What the trainer runs
+    del ngrams
+
+    timed("writeListToFile", writeSortedList, rows)
+    del rows
+
+    decisionList = timed("openList", openList, "sentiment-decision-list.txt")
+
+    def classifyTest():
+        testCorpus = profiling.iterate("testPreProcess", preprocess.preProcess(paths["test"], preprocess.TEST))
+
+        with profiling.stage("classify"):
+            return test.classify(decisionList, testCorpus)
+
+    streamed(["testPreProcess", "classify"], classifyTest)
+    del decisionList
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):  # evaluate prints its results.
+        timed("evaluate", evaluation.evaluate, paths["gold"], "sentiment-system-answers.txt")
+
+    return results
+
+def compare(results, baseline, threshold):
+    """
+    Return the stages whose reviews/sec dropped by more than threshold compared to the baseline.
+    """
+
+    regressions = []
+
+    for stage, result in results["stages"].items():
+        before = baseline["stages"].get(stage, {}).get("reviews_per_sec")
+        after = result["reviews_per_sec"]
+
+        if before and after and after < before / (1 + threshold):
+            regressions.append((stage, before, after))
+
+    return regressions
+
+def printResults(results):
+
+    print("{:<24} {:>9} {:>13} {:>13} {:>12}".format("stage", "seconds", "reviews/sec", "tokens/sec", "peak RSS MB"))
+
+    for stage, result in results["stages"].items():
+        print("{:<24} {:>9.3f} {:>13.1f} {:>13.1f} {:>12.1f}".format(stage, result["seconds"], result["reviews_per_sec"] or 0, result["tokens_per_sec"] or 0, result["peak_rss_mb"]))
+
+def main(reviews, reviewLength, vocabSize, seed, outputPath, baselinePath, threshold):
+
+    config = {"reviews": reviews, "review_length": reviewLength, "vocab_size": vocabSize, "seed": seed}
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = generateCorpus(directory, reviews, reviewLength, vocabSize, seed)
+
+        cwd = os.getcwd()
+        os.chdir(directory) # The programs write their output files to the current directory.
+        try:
+            stages = runStages(paths, reviews, reviewLength)
+        finally:
+            os.chdir(cwd)
+
+    results = {"config": config, "stages": stages}
+
+    printResults(results)
+
+    if outputPath:
+        with open(outputPath, "w") as f:
+            json.dump(results, f, indent=4)
+
+    if baselinePath:
+        with open(baselinePath) as f:
+            baseline = json.load(f)
+
+        if baseline.get("config") != config:
+            print("warning: the baseline was run with {}".format(baseline.get("config")))
+
+        regressions = compare(results, baseline, threshold)
+
+        for stage, before, after in regressions:
+            print("REGRESSION {}: {:.1f} -> {:.1f} reviews/sec".format(stage, before, after))
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the decision list train, test and eval stages.")
+    parser.add_argument("--reviews", type=int, default=1000, help="number of reviews in the synthetic train and test files")
+    parser.add_argument("--review-length", dest="reviewLength", type=int, default=700, help="tokens per review")
+    parser.add_argument("--vocab-size", dest="vocabSize", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", dest="outputPath", help="write the results here as JSON")
+    parser.add_argument("--baseline", dest="baselinePath", help="compare against the JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before a stage counts as a regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    main(args.reviews, args.reviewLength, args.vocabSize, args.seed, args.outputPath, args.baselinePath, args.threshold)
@@ -0,0 +1,81 @@
+"""
+== OVERALL ==
+This program picks the smoothing constant and the pruning thresholds of the training program by k-fold
+cross-validation on the training file, instead of running train, test and eval once for every choice.
+
+== EXAMPLE ==
+python3 decision-list-crossval.py data/sentiment-train.txt --folds 5 --smoothing 0.1 0.5 1 --min-count 1 2 3 --top-k 1000 10000
+python3 decision-list-crossval.py data/sentiment-train.txt --min-score 0 1 2 --default-class 1 --workers 8
+
+> OUTPUT < (--folds 4 --smoothing 0.5 1 --min-count 1 3 --top-k 1000 100000 --default-class 1)
+smoothing  minCount  minScore      topK      rules  coverage  accuracy
+      0.5         1         -      1000     1000.0    1.0000    0.5650
+      0.5         1         -    100000    80456.2    1.0000    0.5650
+      0.5         3         -      1000     1000.0    1.0000    0.5650
+      0.5         3         -    100000    10414.5    1.0000    0.5650
+      1.0         1         -      1000     1000.0    1.0000    0.5500
+...
+best: smoothing 0.5 minCount 1 minScore - topK 1000 accuracy 0.5650
+
+== ALGORITHM ==
+Read the training file once, tokenize it, apply the 'not_handling' and add the n-grams, like the training program
+(or, with --cache-dir, read the preprocessed reviews from the cache).
+Deal the reviews into the folds (review i goes to fold i % folds), and keep the n-gram counts of each fold
+and the features of each of its reviews.
+Add up the counts of the folds into the totals.
+For each fold and smoothing constant, in the worker processes:
+    The training counts are the totals minus the counts of the fold, so nothing is counted twice.
+    Create the decision list like the training program does, with the smoothing constant added to every count.
+    Look up the rules in each held out review once, then classify it with the list pruned at every combination
+    of --min-count, --min-score and --top-k (a review no kept rule matches is wrong unless there is a --default-class).
+Add up the classifications of all the folds and print the accuracy of every configuration, and the best one.
+(The cross-validation itself is in sentiment.crossval.)
+"""
+
+import argparse
+
+from sentiment import corpuscache, crossval, preprocess
+
+def main(filepath, folds, smoothings, minCounts, minScores, topKs, defaultClass, workers, resetScope, features, cache=None):
+
+    levels = crossval.sweepLevels(minCounts, minScores, topKs)  # Every combination of the pruning thresholds
+
+    table = crossval.crossValidate(filepath, folds, smoothings, levels, defaultClass, workers, resetScope, features, cache)
+
+    crossval.printTable(table)
+
+    smoothing, prune, rules, coverage, accuracy = max(table, key=lambda row: row[4])   # The first of the best, in the order of the table
+
+    fields = ["-" if value is None else value for value in (prune.minCount, prune.minScore, prune.topK)]
+    print("best: smoothing {} minCount {} minScore {} topK {} accuracy {:.4f}".format(smoothing, *fields, accuracy))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Cross-validate the smoothing and pruning of a sentiment decision list.")
+    parser.add_argument("filepath", help="the training data")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--smoothing", dest="smoothings", type=float, nargs="+", default=[1], help="the smoothing constants to try")
+    parser.add_argument("--min-count", dest="minCounts", type=int, nargs="+", default=[None], help="the --min-count thresholds to try")
+    parser.add_argument("--min-score", dest="minScores", type=float, nargs="+", default=[None], help="the --min-score thresholds to try")
+    parser.add_argument("--top-k", dest="topKs", type=int, nargs="+", default=[None], help="the --top-k sizes to try")
+    parser.add_argument("--default-class", dest="defaultClass", type=int, choices=[0, 1], help="the class of a review no rule of the pruned list matches")
+    parser.add_argument("--workers", type=int, default=1, help="run the folds in this many worker processes")
+    parser.add_argument("--reset-not-scope", dest="resetScope", action="store_true", help="do not let a 'not' at the end of one review carry over into the next review")
+    parser.add_argument("--order", type=int, default=2, help="use the n-grams up to this order (2 = unigrams and bigrams)")
+    parser.add_argument("--hash-bits", dest="hashBits", type=int, help="hash every feature into 2^HASH_BITS ids")
+    parser.add_argument("--cache-dir", dest="cacheDir", nargs="?", const=corpuscache.DEFAULT_DIRECTORY, help="keep the preprocessed reviews in this cache directory (default {}) and reuse them on the next run".format(corpuscache.DEFAULT_DIRECTORY))
+    parser.add_argument("--cache-size", dest="cacheSize", type=int, default=corpuscache.DEFAULT_MAX_BYTES >> 20, help="the most MB the cache may take up, the least recently used entries go first")
+    args = parser.parse_args()
+
+    if args.folds < 2:
+        parser.error("--folds must be at least 2")
+    if min(args.smoothings) <= 0:
+        parser.error("--smoothing must be above 0")
+    if args.order < 1 or (args.hashBits is not None and not 1 <= args.hashBits <= 32):
+        parser.error("--order must be at least 1 and --hash-bits between 1 and 32")
+
+    features = preprocess.Features(order=args.order, hashBits=args.hashBits)
+    cache = corpuscache.CorpusCache(args.cacheDir, args.cacheSize << 20) if args.cacheDir is not None else None
+
+    main(args.filepath, args.folds, args.smoothings, args.minCounts, args.minScores, args.topKs, args.defaultClass, args.workers, args.resetScope, features, cache)
@@ -6,7 +6,10 @@ Date: Oct. 23, 2020
 This program evaulates whether or not our training and testing program was successful enough to classify reviews as positive or negative.
 == EXAMPLE ==
 python3 decision-list-eval.py data/sentiment-gold.txt sentiment-system-answers.txt
+python3 decision-list-eval.py data/sentiment-gold.txt sentiment-system-answers.txt --profile profile.json
+python3 decision-list-test.py sentiment-decision-list.txt reviews.txt.gz --output - | python3 decision-list-eval.py gold.txt.gz - --scored scored.txt.gz
 
+> OUTPUT FILE (sentiment-system-answers-scored.txt) <
 ...
 cv445_tok-23877.txt 1 | cv445_tok-23877.txt 0 | False
 cv076_tok-14419.txt 0 | cv076_tok-14419.txt 0 | True
@@ -20,11 +23,20 @@ cv426_tok-12735.txt 1 | cv426_tok-12735.txt 0 | False
 cv031_tok-25886.txt 0 | cv031_tok-25886.txt 1 | False
 Precision: 0.7093023255813954
 Recall: 0.61
+F1: 0.6559139784946236
 Accuracy: 0.68
 
+gold \ system          1          0
+1                     61         39
+0                     25         75
+
+Answered: 200
+Missing: 0
+Extra: 0
+
 == ALGORITHM ==
-Process the actual answers and system answers into their own lists and then tokenize them for easy comparison.
-Evaluate whether the system was able to answer correctly compared to the gold standard.
+Read the gold standard answers into a map of filename to classification.
+Stream the system answers one line at a time and look each filename up in the map, so the two files can be in any order.
 If actual and test are the same classification:
     If actual and test is positive:
         then its True Positive
@@ -35,122 +47,49 @@ else if actual and test are not the same classification:
         then its False Positive
     else actual is 1 and test is 0
         then its False Negative
-Calculate precision, recall, and accuracy.
-Output the results to the sentiment-system-answers-scored.txt file.
+A system answer whose filename is not in the map (or was already answered) is Extra,
+and the gold answers still in the map at the end are Missing.
+Calculate precision, recall, F1 and accuracy (0 when there is nothing to divide by) and the confusion matrix.
+Output every joined row and the results to the sentiment-system-answers-scored.txt file (or --scored), through one
+buffered handle, and print the results to the console (to stderr if the scored rows go to stdout).
+(Either answers file can be compressed or '-' for stdin, see sentiment.streams.)
+(The evaluation itself is in sentiment.evaluation.)
 """
-import sys
-
-def splitData(filepath):
-    """
-    Split data with seperate the reviews into their own lists
-    """
-
-    with open(filepath) as file:    # Open the reviews text file.
-        data = file.read()
-
-    data = data.split('\n') # Split the code on a new line, so each review is its own list.
-
-    del data[-1]    # Remove the very last new line [..., ' '].
-
-    return data
-def tokenData(data):
-    """
-    tokenData will tokenize each review into unigrams
-    """
-
-    tokenList = []
-
-    for review in data: # For each review, tokenize the review into unigrams.
-        r = review.split()
-
-        tokenList.append(r)
-    
-    return tokenList
-
-def evaluate(actualAnswers, testAnswers):
-    """
-    Evaluate if the review is positive or negative.
-    """
-    clearOutput()
-
-    truePositive = 0
-    trueNegative = 0
-
-    falsePositive = 0
-    falseNegative = 0
-
-    for x in range(len(actualAnswers)): # Iterate 0 to the number of gold standard answers.
-
-        filenameActual = actualAnswers[x][0]    # Set the gold standard filename
-        classificationActual = int(actualAnswers[x][1]) # Set the gold standard classification
-
-        filenameTest = testAnswers[x][0]    # Set the system answers filename
-        classificationTest = int(testAnswers[x][1]) # Set the system answers classification
-
-        if((classificationActual == classificationTest)):   # If the classifications match [ 0==0 or 1==1]
-            print("{} {} | {} {} | {}\n".format(filenameActual, classificationActual, filenameTest, classificationTest, classificationActual == classificationTest))
-            if(classificationActual == 1):  # If they are both 1, then its True Positive.
-                truePositive += 1
-            else:
-                trueNegative += 1   # If they are both 0, then its True Negative
-        elif((classificationActual != classificationTest)): # If the classification is not the same.
-            print("{} {} | {} {} | {}\n".format(filenameActual, classificationActual, filenameTest, classificationTest, classificationActual == classificationTest))
-            if(classificationActual == 0):  # If the gold standard is 0, then system answer must be 1, so its False Positive
-                falsePositive += 1
-            else:
-                falseNegative += 1  # If the gold standard is 1, then system answer is 0, so its False Negative
-
-        outPutScores(filenameActual, classificationActual, filenameTest, classificationTest)
-
-    precision = (truePositive) / (truePositive + falsePositive) # Calculate precision
-    recall = (truePositive) / (truePositive + falseNegative)    # Calculate recall
-    accuracy = (truePositive + trueNegative) / (truePositive + falsePositive + trueNegative + falseNegative)    # Calculate accuracy
-
-
-    print("Precision: {}\nRecall: {}\nAccuracy: {}".format(precision, recall, accuracy)) # Print the output to the console.
-
-    outputStats(precision, recall, accuracy) # Output precision, recall, and accuracy to the file.
-
-def clearOutput():
-    """
-    Clear the output file from previous training.
-    """
-    with open("sentiment-system-answers-scored.txt", "w") as f:
-        pass
-
-def outPutScores(filenameActual, classificationActual, filenameTest, classificationTest):
-    """
-    Output the scores of the gold standard and the comparative system answers to a file.
-    """
+import argparse
 
-    with open("sentiment-system-answers-scored.txt", "a") as f:
-        f.write("{} {} | {} {} | {}\n".format(filenameActual, classificationActual, filenameTest, classificationTest, classificationActual == classificationTest))  # Write to the file.
+from sentiment import evaluation, profiling, streams
 
-        
-def outputStats(precision, recall, accuracy):
+def evaluate(fileActualAnswers, fileTestAnswers, scoredPath="sentiment-system-answers-scored.txt"):
     """
-    Output the precision, recall, and accuracy of the system answers compared to the gold standard.
+    Evaluate the system answers against the gold standard and write the results to the scored file.
     """
 
-    with open("sentiment-system-answers-scored.txt", "a") as f:
-        f.write("Precision: {}\nRecall: {}\nAccuracy: {}".format(precision, recall, accuracy))  # Write to the file.
+    with profiling.stage("evaluate"):
+        scores = evaluation.evaluateFiles(fileActualAnswers, fileTestAnswers, scoredPath)
 
+    profiling.items("evaluate", scores.answered + scores.extra)
 
-def main(fileActualAnswers, fileTestAnswers):
+    print(scores.summary(), file=streams.reportStream(scoredPath)) # Print the output to the console.
 
-    preActualAnswers = splitData(fileActualAnswers) # Split the gold standards into their own lists
-    preTestAnswers = splitData(fileTestAnswers) # Split the system answers into the own lists
+    return scores
 
-    actualAnswers = tokenData(preActualAnswers) # Tokenize the gold standards for easy comparison
-    testAnswers = tokenData(preTestAnswers) # Tokenize the system answers for easy comparison
+def main(fileActualAnswers, fileTestAnswers, scoredPath="sentiment-system-answers-scored.txt"):
 
-    evaluate(actualAnswers, testAnswers)    # Evaluate the gold standard to system answers and write the results to a file
+    evaluate(fileActualAnswers, fileTestAnswers, scoredPath)    # Evaluate the gold standard to system answers and write the results to a file
 
 
 if __name__ == "__main__":
 
-    fileActualAnswers = sys.argv[1] # Get the filename of the gold standard from the user
-    fileTestAnswers = sys.argv[2]   # Get the filename of the system answers from the user
+    parser = argparse.ArgumentParser(description="Score system answers against the gold standard.")
+    parser.add_argument("fileActualAnswers", help="the gold standard answers")  # Get the filename of the gold standard from the user
+    parser.add_argument("fileTestAnswers", help="the system answers")   # Get the filename of the system answers from the user
+    parser.add_argument("--scored", dest="scoredPath", default="sentiment-system-answers-scored.txt", help="where to write the joined rows and the results, '-' for stdout, .gz/.bz2/.xz to compress")
+    parser.add_argument("--profile", dest="profilePath", nargs="?", const="-", help="write a JSON summary of the time and memory of every stage to this file (stderr without one), or set SENTIMENT_PROFILE")
+    parser.add_argument("--cprofile", dest="cprofilePath", help="also write a cProfile dump of the run here, or set SENTIMENT_CPROFILE")
+    args = parser.parse_args()
 
+    if streams.isStdio(args.fileActualAnswers) and streams.isStdio(args.fileTestAnswers):
+        parser.error("only one of the answers files can be read from stdin")
 
-    main(fileActualAnswers, fileTestAnswers)    # Run the program
\ No newline at end of file
+    with profiling.session("eval", args.profilePath, args.cprofilePath):
+        main(args.fileActualAnswers, args.fileTestAnswers, args.scoredPath)    # Run the program
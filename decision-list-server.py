@@ -0,0 +1,72 @@
+"""
+== OVERALL ==
+This program keeps the decision list from the training program in memory and classifies reviews sent to it,
+so a classification does not have to start python and read the decision list every time.
+
+== EXAMPLE ==
+python3 decision-list-server.py sentiment-decision-list.txt --port 8765
+python3 decision-list-server.py sentiment-decision-list.bin --unix /tmp/sentiment.sock
+python3 decision-list-server.py sentiment-decision-list.bin --prediction-cache 100000    (answer repeated reviews from memory)
+python3 decision-list-server.py sentiment-decision-list.bin --reload-interval 1    (look for a retrained list every second)
+
+> REQUESTS (one JSON object per line) <
+
+echo '{"id": 1, "review": "this movie was not good ."}' | nc localhost 8765
+{"id": 1, "label": 0}
+
+echo '{"id": 2, "reviews": ["a fine film .", "dull and slow ."]}' | nc localhost 8765
+{"id": 2, "labels": [1, 0]}
+
+== ALGORITHM ==
+Read the decision list from the users input once.
+For each request, tokenize the review, apply the 'not_handling' and add the n-grams, the same as the test program.
+Queue the reviews of every request that comes in, and classify everything in the queue as one batch.
+(With --prediction-cache the answers of the most recent reviews are kept, keyed by a hash of their tokens, and a review
+that comes in again is answered without being preprocessed or looked up, see sentiment.predictioncache.
+The hits and misses are printed when the server stops.)
+For each review the first rule in the decision list that is in the review gives the label. If none is, the review
+gets --default-class, or else the default class of a pruned list, or else the prior class the list records
+(null only for a list trained before the prior class was recorded).
+Write the labels back as a JSON line.
+Every --reload-interval seconds (5 by default), check whether the trainer published a new version of the decision list.
+If it did, load it in the background while the old one keeps answering, and swap it in between two batches
+(see sentiment.hotreload). A list that fails to load is reported and the old one stays.
+"""
+
+import argparse
+import sys
+
+from sentiment import hotreload, server
+from sentiment.predictioncache import PredictionCache
+
+def main(fileDecisionList, host, port, unixPath, maxBatch, defaultClass=None, cacheEntries=0, reloadInterval=hotreload.DEFAULT_INTERVAL):
+
+    cache = PredictionCache(cacheEntries) if cacheEntries else None
+
+    reloader = hotreload.ModelReloader(fileDecisionList, keepScores=False, cache=cache, interval=reloadInterval)  # Read the decision list, and later its new versions
+
+    server.serve(reloader.model, host, port, unixPath, maxBatch, defaultClass, reloader if reloadInterval else None)  # Answer requests until interrupted, a review no rule matches gets defaultClass or the fallback class of the list
+
+    if cache is not None:
+        print(cache.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Serve a sentiment decision list over TCP or a Unix socket.")
+    parser.add_argument("fileDecisionList", help="the decision list, text or binary")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", dest="unixPath", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--max-batch", dest="maxBatch", type=int, default=1024, help="the most reviews classified in one batch")
+    parser.add_argument("--default-class", dest="defaultClass", type=int, choices=[0, 1], help="the label of a review no rule matches (default: the default class of a pruned list, otherwise the class the training counts have more of)")
+    parser.add_argument("--prediction-cache", dest="cacheEntries", type=int, default=0, help="keep the answers of this many recent reviews and answer repeats from memory (0 = no cache)")
+    parser.add_argument("--reload-interval", dest="reloadInterval", type=float, default=hotreload.DEFAULT_INTERVAL, help="seconds between checks for a new version of the decision list (0 = never reload)")
+    args = parser.parse_args()
+
+    if args.cacheEntries < 0:
+        parser.error("--prediction-cache must be 0 or more")
+    if args.reloadInterval < 0:
+        parser.error("--reload-interval must be 0 or more")
+
+    main(args.fileDecisionList, args.host, args.port, args.unixPath, args.maxBatch, args.defaultClass, args.cacheEntries, args.reloadInterval)    # Run the program
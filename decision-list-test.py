@@ -7,8 +7,16 @@ This program will classify a review as positive or negative based on the decisio
 
 == EXAMPLE ==
 python3 decision-list-test.py sentiment-decision-list.txt data/sentiment-test.txt
+python3 decision-list-test.py sentiment-decision-list.bin data/sentiment-test.txt
+python3 decision-list-test.py sentiment-decision-list.txt data/sentiment-test.txt --batch-size 10000
+python3 decision-list-test.py sentiment-decision-list.txt data/sentiment-test.txt --cache-dir
+python3 decision-list-test.py sentiment-decision-list.txt data/sentiment-test.txt --matcher automaton
+python3 decision-list-test.py sentiment-decision-list.bin data/sentiment-test.txt --workers 8
+python3 decision-list-test.py sentiment-decision-list.txt data/sentiment-test.txt --profile profile.json
+python3 decision-list-test.py sentiment-decision-list.txt data/sentiment-test.txt --explain sentiment-system-explanations.txt
+xzcat reviews.txt.xz | python3 decision-list-test.py sentiment-decision-list.txt.gz - --output answers.txt.gz
 
-> OUTPUT FILE <
+> OUTPUT FILE < (sentiment-system-answers.txt, or --output)
 
 cv666_tok-13320.txt 1
 cv535_tok-19937.txt 0
@@ -22,166 +30,235 @@ cv415_tok-28738.txt 0
 cv204_tok-10080.txt 1
 ...
 
+> EXPLANATION FILE (--explain) <
+filename label rule rank score opposing_rule opposing_rank opposing_score
+
+cv666_tok-13320.txt 1 clooney 12 3.8326 plans 3212 1.8816
+cv535_tok-19937.txt 0 supposed 63 3.2967 fear--and 3335 1.6627
+...
+
 == ALGORITHM ==
-Split the reviews into their own lists for easy processing.
+Split the reviews into their own lists for easy processing, streaming one review at a time.
+(With --cache-dir the preprocessed reviews are read from the cache instead if this file was preprocessed the same way before.)
 Tokenize the reviews so we have unigrams.
-Apply the 'not_handling' to the unigrams.
-Generate the bigrams and add it to the review.
-Read the decision list from the users input.
-For each review, Depending on the words order in the decision list,
-If the word is in the review, classify the review as such.
-Write the filename and classification to the output file.
+Apply the 'not_handling' to the unigrams (with --reset-not-scope a 'not' does not carry over to the next review).
+Generate the n-grams (bigrams unless the decision list says otherwise) and add it to the review.
+Read the decision list from the users input, a binary decision list is memory mapped instead of parsed
+(into a sentiment.model.DecisionListModel, which python programs can also use in-process).
+Index the decision list by rule so each rule maps to its rank in the list.
+For each review, look up every unique token in the index and keep the lowest rank,
+which is the first rule in the decision list that is in the review, and classify the review as such.
+If no rule is in the review, classify it as --default-class, or else the default class of a pruned decision list, or else
+the prior class the decision list records (the class with the most n-grams in the training counts), so every review
+gets a line in the output file.
+Write the filename and classification to the output file, and print how many reviews a rule matched (the coverage).
+With --explain, the same lookup also keeps the first rule of the other class that is in the review, and the
+winning rule, its rank and log score and the opposing rule, its rank and log score are written to the explanation file
+('-' where there is no such rule).
+(With --batch-size the reviews are classified in batches as a sparse reviews x rules matrix, see sentiment.batch.)
+(With --matcher automaton the n-grams are not generated. The rules are compiled into an Aho-Corasick automaton over
+words instead and each review is scanned once, word by word, for its first rule, see sentiment.automaton.)
+(The reviews can be compressed with gzip, bz2 or xz, or read from stdin with '-', and --output - writes the answers
+to stdout, see sentiment.streams.)
+(With --workers the file is split into chunks at line boundaries and classified in worker processes that share the
+decision list, the answers are written in the order of the reviews, see sentiment.parallel.)
 """
 
-import sys
-import json
-import re
-from collections import OrderedDict
+import argparse
 
-def splitData(filepath):
+from sentiment import automaton, batch, corpuscache, parallel, preprocess, profiling, streams
+from sentiment.classifier import listFeatures, fallbackClass, buildRuleIndex, matchReview, explainReview, ruleClasses, explanation, Coverage, EXPLAIN_HEADER
+from sentiment.model import DecisionListModel
+
+def classifyExplained(decisionList, data, explainPath, defaultClass=None, ruleAutomaton=None, answersPath="sentiment-system-answers.txt"):
     """
-    Split data with seperate the reviews into their own lists
+    classify, but every decision is also explained in explainPath, from the same lookup.
     """
 
-    with open(filepath) as file:    # Open the reviews text file.
-        data = file.read()
+    classes = ruleClasses(decisionList)
 
-    data = data.split('\n') # Split the code on a new line, so each review is its own list.
+    if ruleAutomaton is not None:   # Scan the words of each review instead of looking up its n-grams
+        explain = ruleAutomaton.explain
+    else:
+        ruleIndex = buildRuleIndex(decisionList)
+        explain = lambda review: explainReview(ruleIndex, classes, review)
 
-    del data[-1]    # Remove the very last new line [..., ' '].
+    coverage = Coverage()
 
-    return data
+    with streams.openOutput(answersPath) as f, streams.openOutput(explainPath) as e:
+        e.write(EXPLAIN_HEADER)
 
-def tokenData(data):
-    """
-    tokenData will tokenize each review into unigrams
-    """
+        for review in data:
+            rank, opposingRank = explain(review)  # The first rule in the review and the first one of the other class
+            label = classes[rank] if rank is not None else defaultClass
 
-    tokenList = []
+            coverage.reviews += 1
+            coverage.unmatched += rank is None
 
-    for review in data: # For each review, tokenize the review into unigrams.
-        r = review.split()
-        del r[1]    # Remove the '__' in the review, we do not need it.
+            if label is not None:
+                f.write("{} {}\n".format(review[0], label))
+                e.write(explanation(decisionList, review, label, rank, opposingRank))
 
-        tokenList.append(r)
-    
-    return tokenList
+    return coverage
 
-def notHandling(data):
+def classify(decisionList, data, defaultClass=None, ruleAutomaton=None, answersPath="sentiment-system-answers.txt"):
     """
-    notHandling will append 'not_' to words after not appears in the text
+    Based on the decision list, classify will say whether a review is positive or negative.
+    A review no rule matches gets defaultClass, or is left out if there is none.
+    Returns the Coverage of the reviews.
+    With a ruleAutomaton (a sentiment.automaton.RuleAutomaton) the reviews have no n-grams and their words are scanned instead.
     """
 
-    notHandlingFlag = False
-
-    for review in data:
-        for x in range(len(review)):
-            
-            specialMatch = re.match(r"""[()-,?\/:'"|]""", review[x]) #  Do not append 'not_' to a special char.
-            endSentenceMatch = re.match(r'[.!?]', review[x])    # Make sure we can find the end of the sentence.
+    if ruleAutomaton is not None:
+        match = ruleAutomaton.match
+    else:
+        ruleIndex = buildRuleIndex(decisionList)    # Map every rule to its position in the decision list
+        match = lambda review: matchReview(ruleIndex, review)
 
-            if endSentenceMatch and notHandlingFlag:    # Stop appending 'not_' to words.
-                notHandlingFlag = False
-            elif notHandlingFlag and not specialMatch:  # Append 'not_' to a word.
-                review[x] = "not_{}".format(review[x])
+    coverage = Coverage()
 
-            if review[x] == "not":  # If the current word is "not", turn the Flag to True, so we can append 'not_' to the rest of the words.
-                notHandlingFlag = True
-            
-    return data
+    with streams.openOutput(answersPath) as f:    # The answers of a previous run are overwritten
 
-def bigram(reviewsList):
+        for review in data: # For each review
+            rank = match(review)   # Find the highest ranked rule that is in the review.
+            coverage.reviews += 1
+            if rank is not None:    # If a decision list word is in the review, then we found it!
+                classVal = decisionList[rank][1]  # Classify whether the review is positive or negative
+                output = "{} {}\n".format(review[0], str(classVal)) # Write to the file with filename {0/1}
+                f.write(output)
+            else:
+                coverage.unmatched += 1
+                if defaultClass is not None:    # The default class of a pruned list, or the class the list says is more common.
+                    f.write("{} {}\n".format(review[0], defaultClass))
+
+    return coverage
+
+def classifyBatches(decisionList, data, batchSize, defaultClass=None, answersPath="sentiment-system-answers.txt"):
     """
-    Bigram will create the bigrams of the reviews.
+    classify, but the reviews are classified batchSize at a time by the sparse matrix engine in sentiment.batch.
     """
-    
-    step = 1
-    N_Gram = 2
 
-    newTokens = []
-    
-    for review in reviewsList:
-        
-        for i in range(1, len(review), step):   # Slide across the data based on the step to gather the ngram model.
-            # If bigram: ["The red", "red fox", "fox jumped", "jumped ."]
+    engine = batch.BatchClassifier(decisionList, defaultClass)
+
+    with streams.openOutput(answersPath) as f:    # The answers of a previous run are overwritten
 
-            newTokens.append(' '.join(review[i : i + 2]))   # Generate the bigrams of the review text
-        
-        review.extend(newTokens)    # Add the new bigrams to the original review for easy computation
-        newTokens = []
+        for reviews in batch.batches(data, batchSize):
+            labels = engine.classifyBatch(reviews)  # Classify the whole batch at once
+            f.writelines("{} {}\n".format(review[0], label) for review, label in zip(reviews, labels) if label != batch.NO_MATCH)
 
-    return reviewsList
+    return engine.coverage
 
-def openList(filename):
+def classifyBatchesExplained(decisionList, data, batchSize, explainPath, defaultClass=None, answersPath="sentiment-system-answers.txt"):
     """
-    Open the decision list and append it to a list.
+    classifyBatches, but every decision is also explained in explainPath, from the same batch lookup.
     """
 
-    decList = []
+    engine = batch.BatchClassifier(decisionList, defaultClass)
+    classes = ruleClasses(decisionList)
 
-    run = True
-    count = 0
+    with streams.openOutput(answersPath) as f, streams.openOutput(explainPath) as e:
+        e.write(EXPLAIN_HEADER)
 
-    data = splitData(filename)  # Split the data by new line for easy comprehension
+        for reviews in batch.batches(data, batchSize):
+            for review, (rank, opposingRank) in zip(reviews, engine.explainBatch(reviews)):
+                label = classes[rank] if rank is not None else defaultClass
 
-    for line in data:
-        line = line.split() # Split the line by space to seperate the word class and classifier
-        line[0] = line[0].replace("--", " ")    # Replace the bigram 'space' between two words
-        del line[2] # Remove the log value, we dont need it. List is already in order
-        decList.append(line)    # Append the line to the decision list
-    
-    return decList
+                if label is not None:
+                    f.write("{} {}\n".format(review[0], label))
+                    e.write(explanation(decisionList, review, label, rank, opposingRank))
 
-def clearOutput():
-    """
-    Clear the output file from previous training.
-    """
-    with open("sentiment-system-answers.txt", "w") as f:
-        pass
+    return engine.coverage
 
-def classify(decisionList, data):
-    """
-    Based on the decision list, classify will say whether a review is positive or negative.
-    """
+def main(fileDecisionList, fileTestData, batchSize=None, resetScope=False, explainPath=None, cache=None, matcher="index", workers=1, defaultClass=None, answersPath="sentiment-system-answers.txt"):
 
-    clearOutput() # Clear the output file of previous answers
+    with profiling.stage("openList"):
+        model = DecisionListModel.load(fileDecisionList, keepScores=explainPath is not None)   # Get the decision list from the file, a binary decision list is mapped, nothing to parse
+        defaultClass, source = model.fallbackClass(defaultClass)   # The class of a review no rule matches: --default-class, the default class of a pruned list or the more common class
 
-    with open("sentiment-system-answers.txt", "a") as f:
+    decisionList, features = model.decisionList, model.features
 
-        for review in data: # For each review
-            for x in range(len(decisionList)):  # Iterate through the decision list.
-                if(decisionList[x][0] in review):   # If the decision list word is in the review, then we found it!
-                    classVal = decisionList[x][1]  # Classify whether the review is positive or negative
-                    output = "{} {}\n".format(review[0], str(classVal)) # Write to the file with filename {0/1}
-                    f.write(output)
-                    break   # Stop classifying this review becuase we found a matching word in the decision list
+    profiling.items("openList", len(decisionList))
+
+    if workers > 1:
+        reviewList = None   # The workers preprocess their own chunks of the file.
+    elif matcher == "automaton":
+        reviewList = preProcess(fileTestData, resetScope, features._replace(order=1), cache) # Only the words, the automaton finds the n-grams itself
+    else:
+        reviewList = preProcess(fileTestData, resetScope, features, cache)   # Preprocess the data, building the same features the decision list was trained with
+
+    ruleAutomaton = None
 
-def main(fileDecisionList, fileTestData):
+    if matcher == "automaton":
+        with profiling.stage("compileRules"):
+            ruleAutomaton = automaton.RuleAutomaton(decisionList, features.order)   # Compile the rules into a word automaton
 
-    reviewList = preProcess(fileTestData)   # Preprocess the data
+        profiling.items("compileRules", len(ruleAutomaton.ranks))
 
-    decisionList = openList(fileDecisionList)   # Get the decision list from the file
+    with profiling.stage("classify"):
+        if workers > 1:
+            coverage = parallel.classifyFile(decisionList, fileTestData, workers, answersPath, explainPath, defaultClass, resetScope, features, ruleAutomaton)    # Classify chunks of the file in worker processes
+        elif explainPath and batchSize:
+            coverage = classifyBatchesExplained(decisionList, reviewList, batchSize, explainPath, defaultClass, answersPath)
+        elif explainPath:
+            coverage = classifyExplained(decisionList, reviewList, explainPath, defaultClass, ruleAutomaton, answersPath)    # Classify and explain every decision
+        elif batchSize:
+            coverage = classifyBatches(decisionList, reviewList, batchSize, defaultClass, answersPath)    # Classify the reviews a batch at a time
+        else:
+            coverage = classify(decisionList, reviewList, defaultClass, ruleAutomaton, answersPath)  # Classify whether a review is positive or negative based on the decision list
 
-    classify(decisionList, reviewList)  # Classify whether a review is positive or negative based on the decision list
+    profiling.counter("reviews", coverage.reviews)
+    profiling.counter("unmatched", coverage.unmatched)
 
+    print(coverage.summary(defaultClass, source), file=streams.reportStream(answersPath))   # How many reviews a rule decided, the rest got the fallback class
 
-def preProcess(filepath):
+
+def preProcess(filepath, resetScope=False, features=preprocess.DEFAULT_FEATURES, cache=None):
     """
     preProcess will process the data before we start training the data.
+    The reviews are streamed from the file one at a time, see sentiment.preprocess.
+    With a cache (a corpuscache.CorpusCache) the reviews come from the cache.
     """
-    
-    split = splitData(filepath) # Split into their own reviews
-    tokens = tokenData(split)   # Tokenize the reviews so we have unigrams
-    notHandlingData = notHandling(tokens)   # Do the not handling.
 
-    #bigram module here
-    corpus = bigram(notHandlingData)
+    if cache is not None:
+        with profiling.stage("preProcess"):
+            return cache.corpus(filepath, preprocess.TEST, resetScope, features)
 
-    return corpus
+    return profiling.iterate("preProcess", preprocess.preProcess(filepath, preprocess.TEST, resetScope, features))
 
 if __name__ == "__main__":
 
-    fileDecisionList = sys.argv[1]  # Grab the filename of the decision list
-    fileTestData = sys.argv[2]  # Grab the test filename
-
-    main(fileDecisionList, fileTestData)    # Run the program
+    parser = argparse.ArgumentParser(description="Classify reviews with a sentiment decision list.")
+    parser.add_argument("fileDecisionList", help="the decision list, text (can be compressed) or binary")  # Grab the filename of the decision list
+    parser.add_argument("fileTestData", help="the reviews to classify, can be compressed, '-' for stdin")  # Grab the test filename
+    parser.add_argument("--output", dest="answersPath", default="sentiment-system-answers.txt", help="where to write the answers, '-' for stdout, .gz/.bz2/.xz to compress")
+    parser.add_argument("--batch-size", dest="batchSize", type=int, help="classify this many reviews at a time with the batch engine")
+    parser.add_argument("--matcher", choices=["index", "automaton"], default="index", help="look up the n-grams of each review in a rule index, or scan its words with an automaton of the rules")
+    parser.add_argument("--default-class", dest="defaultClass", type=int, choices=[0, 1], help="the class of a review no rule matches (default: the default class of a pruned list, otherwise the class the training counts have more of)")
+    parser.add_argument("--workers", type=int, default=1, help="classify the file in chunks in this many worker processes")
+    parser.add_argument("--reset-not-scope", dest="resetScope", action="store_true", help="do not let a 'not' at the end of one review carry over into the next review")
+    parser.add_argument("--cache-dir", dest="cacheDir", nargs="?", const=corpuscache.DEFAULT_DIRECTORY, help="keep the preprocessed reviews in this cache directory (default {}) and reuse them on the next run".format(corpuscache.DEFAULT_DIRECTORY))
+    parser.add_argument("--cache-size", dest="cacheSize", type=int, default=corpuscache.DEFAULT_MAX_BYTES >> 20, help="the most MB the cache may take up, the least recently used entries go first")
+    parser.add_argument("--profile", dest="profilePath", nargs="?", const="-", help="write a JSON summary of the time and memory of every stage to this file (stderr without one), or set SENTIMENT_PROFILE")
+    parser.add_argument("--cprofile", dest="cprofilePath", help="also write a cProfile dump of the run here, or set SENTIMENT_CPROFILE")
+    parser.add_argument("--explain", dest="explainPath", help="also write the rule behind each decision and the best opposing rule to this file")
+    args = parser.parse_args()
+
+    if streams.isStdio(args.fileDecisionList):
+        parser.error("the decision list is read more than once, it has to be a file")
+    if args.workers > 1 and not streams.isPlainFile(args.fileTestData):
+        parser.error("--workers seeks to chunks of the reviews, they have to be an uncompressed file")
+    if args.cacheDir is not None and streams.isStdio(args.fileTestData):
+        parser.error("--cache-dir hashes the reviews before reading them, they have to be a file")
+    if fallbackClass(args.fileDecisionList, args.defaultClass)[0] is None:
+        parser.error("the decision list does not record its prior class (it was trained before it was), give --default-class so every review gets an answer")
+    if args.workers > 1 and (args.batchSize or args.cacheDir is not None):
+        parser.error("--workers preprocesses and classifies the file one review at a time in every worker, it cannot be used with --batch-size or --cache-dir")
+    if args.matcher == "automaton" and args.batchSize:
+        parser.error("--matcher automaton classifies one review at a time, it cannot be used with --batch-size")
+    if args.matcher == "automaton" and listFeatures(args.fileDecisionList).hashBits:
+        parser.error("--matcher automaton needs the words of the rules, the decision list was trained with hashed features")
+
+    cache = corpuscache.CorpusCache(args.cacheDir, args.cacheSize << 20) if args.cacheDir is not None else None
+
+    with profiling.session("test", args.profilePath, args.cprofilePath):
+        main(args.fileDecisionList, args.fileTestData, args.batchSize, args.resetScope, args.explainPath, cache, args.matcher, args.workers, args.defaultClass, args.answersPath)    # Run the program
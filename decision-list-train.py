@@ -8,6 +8,18 @@ This program will then output the decision list to sentiment-decision-list.txt
 
 == EXAMPLE ==
 python3 decision-list-train.py data/sentiment-train.txt
+python3 decision-list-train.py data/sentiment-train.txt --format binary    (writes sentiment-decision-list.bin)
+python3 decision-list-train.py data/sentiment-train.txt --workers 8    (count the n-grams in 8 processes)
+python3 decision-list-train.py data/sentiment-train.txt --order 3 --hash-bits 20    (trigrams, hashed into 2^20 features)
+python3 decision-list-train.py data/sentiment-train.txt --snapshot counts.json    (also save the n-gram counts)
+python3 decision-list-train.py new-reviews.txt --snapshot counts.json --update    (add new reviews to the saved counts and retrain)
+python3 decision-list-train.py data/sentiment-train.txt --min-count 3 --top-k 20000 --default-class 1    (a pruned list)
+python3 decision-list-train.py data/sentiment-train.txt --prune-report heldout.txt    (coverage and accuracy of each pruning level)
+python3 decision-list-train.py data/sentiment-train.txt --cache-dir    (preprocess once, later runs on the same file reuse the cached reviews)
+python3 decision-list-train.py data/sentiment-train.txt --profile profile.json    (time and memory of every stage, see sentiment.profiling)
+python3 decision-list-train.py data/sentiment-train.txt --smoothing 0.5    (add 0.5 to every count instead of 1, see decision-list-crossval.py)
+zcat reviews.txt.gz | python3 decision-list-train.py - --output - | gzip > sentiment-decision-list.txt.gz    (a stage of a pipeline)
+python3 decision-list-train.py reviews.txt.xz --output sentiment-decision-list.txt.gz    (reads and writes gzip, bz2 and xz, see sentiment.streams)
 
 > OUPUT FILE <
 seagal 0 5.9581121091291385
@@ -19,274 +31,155 @@ maximus 1 4.828974215422479
 
 
 == ALGORITHM ==
-Read the training file from the user.
+Read the training file from the user, one review (line) at a time so memory stays flat.
+(With --cache-dir the preprocessed reviews are read from the cache instead if this file was preprocessed the same way before,
+see sentiment.corpuscache.)
 Process the data first by spliting the reviews into seperate lists by the newline char.
+(The training file can be compressed with gzip, bz2 or xz, or read from stdin with '-', see sentiment.streams.)
 Tokenize the reviews so we can get unigrams.
-Apply the not_handling to the unigrams.
-Generate the bigrams of the review text, then add it to the review text.
-Seperate the reviews into their respective class within a dictionary.
+Apply the not_handling to the unigrams (with --reset-not-scope a 'not' does not carry over to the next review).
+Generate the bigrams of the review text (or every n-gram up to --order), then add it to the review text.
+The words of an n-gram are joined with '--', the classifier builds its n-grams the same way.
+With --hash-bits every unigram and n-gram is hashed into a fixed number of ids instead.
+Pair each review with its respective class.
 Create the positive and negative ngram count for positive and negative classified words within the reviews.
+(Every n-gram gets an int id the first time it is seen and the counts are arrays indexed by id, see sentiment.counts.)
+(With --workers the file is split into shards on line boundaries, each shard is counted in its own process and the counts are merged.)
 Classify whether a word is positive or negative depending on whether the word appears more in positive or negative reviews.
+(A word that appears as often in both gets the prior class, so training the same reviews always gives the same list.)
+(With --update the saved counts are loaded and only the new reviews are counted and added to them,
+with the n-grams and the not handling the snapshot was counted with.)
 Generate the decision list and sort it based on the hightest to lowers log computation.
-Write the decision list to sentiment-decision-list.txt.
+(If NumPy is installed the classifying, scoring and sorting is done on arrays of counts, see sentiment.scoring.)
+Prune the decision list if asked: drop rules for rare words or with low scores, keep only the top K,
+and record the default class for reviews none of the kept rules match.
+Write the decision list to sentiment-decision-list.txt, or to the binary sentiment-decision-list.bin with --format binary,
+together with the prior class (the class with the most n-grams in the counts), which the test program gives the reviews no rule matches.
+The list is written to a temporary file and renamed over the old one, stamped with a new version, so a program reading
+the list meanwhile gets the whole old one, and a running server (decision-list-server.py) notices the new version and reloads it.
+(--output writes it somewhere else, a text list also to stdout with '-' or compressed with .gz, .bz2 or .xz.)
+The binary list can be exported back to text with: python3 -m sentiment.listfile export sentiment-decision-list.bin out.txt
+(The scoring is in sentiment.training, and the list is written by sentiment.model.DecisionListModel, which can also be
+trained and used from python without the files, see sentiment.model.)
 """
 
-import re
-import sys
-import math
-import random
+import os
+import argparse
+import contextlib
 import json
 from pprint import pprint
 from collections import OrderedDict
 
-def splitData(filepath):
-    """
-    Split data with seperate the reviews into their own lists
-    """
-
-    with open(filepath) as file:    # Open the reviews text file.
-        data = file.read()
-
-    data = data.split('\n') # Split the code on a new line, so each review is its own list.
-
-    del data[-1]    # Remove the very last new line [..., ' '].
-
-    return data
-
-def tokenData(data):
-    """
-    tokenData will tokenize each review into unigrams
-    """
-
-    tokenList = []
-
-    for review in data: # For each review, tokenize the review into unigrams.
-        r = review.split()
-        del r[0]    # Remove the filename, we do not need it.
-
-        tokenList.append(r)
-    
-    return tokenList
-
-def notHandling(data):
-    """
-    notHandling will append 'not_' to words after not appears in the text
-    """
-
-    notHandlingFlag = False
-
-    for review in data:
-        for x in range(len(review)):
-            
-            specialMatch = re.match(r"""[()-,?\/:'"|]""", review[x]) #  Do not append 'not_' to a special char.
-            endSentenceMatch = re.match(r'[.!?]', review[x])    # Make sure we can find the end of the sentence.
-
-            if endSentenceMatch and notHandlingFlag:    # Stop appending 'not_' to words.
-                notHandlingFlag = False
-            elif notHandlingFlag and not specialMatch:  # Append 'not_' to a word.
-                review[x] = "not_{}".format(review[x])
-
-            if review[x] == "not":  # If the current word is "not", turn the Flag to True, so we can append 'not_' to the rest of the words.
-                notHandlingFlag = True
-            
-    return data
-
-def bundleData(data):
-    """
-    bundleData will create a single dictionary that contains a positive and negative dictionay
-    """
-
-    reviews = {"pos": [], "neg": []} # Gross dictionary to 'bundle' our data.
-
-    for token in data: # If the token is in the negative review, add it to the negative dictionary.
-        if(token[0]) == '0':
-            del token[0]
-            reviews["neg"].append(token)
-        else:           # If the token is in the positive review, add it to the positive dictionary.
-            del token[0]
-            reviews["pos"].append(token)
-
-    return reviews
-            
-def getNgramCounts(data):
-    """
-    getNgramCounts will insert a token in their respective class and will gather a count of that token so we can
-    calculate the probability
-    """
-
-    ngramCount = {"pos": {}, "neg": {}} # Another gross dictionary that holds the counts of each word within a class.
-
-    for key, review in data.items():
-        for tokens in review:
-            for token in tokens:
-                if token not in ngramCount[key]:    # If the token is not in the dictionary, add it.
-                    ngramCount[key][token] = 1
-                else:
-                    ngramCount[key][token] += 1 # Add one to the value of token if it is already in there.
-
-    return ngramCount
-
-def classify(wordList, ngrams):
-    """
-    Classify will assign the unigram or bigram to their respected class.
-    If 'the' appears more in positive than negative, then assign it to be positive.
-    If 'the' appears more in negative than positive, then assign it to be negative.
-    If 'the' does not appear more in positive or negative, then flip a coin.
-    """
-
-    positive = ngrams['pos']
-    negative = ngrams['neg']
-
-    result = {}
-
-    for word in wordList:
-
-        if word not in positive:    # If word not in positive, assign it negative
-            result[word] = 0
-            continue
-
-        if word not in negative:    # If word not in negative, assign it positive
-            result[word] = 1
-            continue
-        
-        if(positive[word] > negative[word]):    # If word appears more in positive than negative, assign it to positive.
-            result[word] = 1
-        elif (positive[word] < negative[word]): # If word appears more in negative than positive, assign it to negative.
-            result[word] = 0
-        else:
-            result[word] = random.randint(0, 1) # Flip a coin to decide what it should be assigned to.
-    
-    return result
+from sentiment import corpuscache, preprocess, profiling, pruning, streams
+from sentiment.counts import countCorpus, countFile, priorClass, saveSnapshot, loadSnapshot, updateSnapshotCounts
+from sentiment.model import DecisionListModel
+from sentiment.training import countLength, scoreCounts
 
-def countLength(id, ngrams):
-    """
-    CountLength will return the total of words within all positive or negative reviews
-    """
-
-    count = 0
-
-    for word, value in ngrams[id].items():
-        count += value
-
-    return count
-
-def clearOutput():
-    """
-    Clear the output file from previous training.
-    """
-    with open("sentiment-decision-list.txt", "w") as f:
-        pass
-
-def createDecisionList(ngrams, review, posVocabLength, negVocabLength, reviewVocabLength, masterClassified):
-    """
-    CreateDecisionList does that. It will calcualte the absolute log function of the positive and negative probability.
-
-    abs(log2(P(good | positive) / P(good | negative)))
-
-    """
-
-    positive = ngrams['pos']
-    negative = ngrams['neg']
-
-    discussionList = {}
-
-    for word in review:
-        
-        if word in positive:
-            x = ngrams["pos"][word] + 1 # If the word appears in the positive dictionary, then get the count and add 1
-        else: 
-            x = 1   # If the word does not exist in the positive dictionary, then 0 + 1
-
-        if word in negative:
-            y = ngrams["neg"][word] + 1 # If the word appears in the negative dictionary, then get the count and add 1
-        else:
-            y = 1    # If the word does not exist in the negative dictionary, then 0 + 1
-
-        # reviewVocabLength is the |V| of unique words for smoothing
-
-        p = (x / (posVocabLength + abs(reviewVocabLength))) # P(good | positive)
-        p1 = (y / (negVocabLength + abs(reviewVocabLength)))    # P(good | negative)
-        
-        value = abs(math.log2(p/p1))
-
-        discussionList[word] = {"val": value, "class": masterClassified[word]}  # Create and return the discussion list
-
-    return discussionList
-
-def writeListToFile(discussionList):
-    """
-    WriteListToFile will output the discussion list to the sentiment-decision-list.txt as JSON data.
-    """
-    clearOutput()
-
-    sortedDiscussionList = sorted(discussionList.items(), key=lambda x: x[1]["val"], reverse=True)  # We must sort the discussion list based on the Log value we computed
-
-    with open("sentiment-decision-list.txt", "w") as filename:
-        #json.dump(sortedDiscussionList, filename, indent=4) # Write the list in JSON for easy viewing
-        for i in range(len(sortedDiscussionList)):
-            filename.write("{} {} {}\n".format(sortedDiscussionList[i][0], sortedDiscussionList[i][1]["class"], sortedDiscussionList[i][1]["val"]))
-
-
-def bigram(reviewsList):
-    """
-    Bigram will create the bigrams of the reviews.
-    """
-    
-    step = 1
-    N_Gram = 2
-
-    newTokens = []
-    for review in reviewsList:
-        
-        for i in range(1, len(review), step):   # Slide across the data based on the step to gather the ngram model.
-            # If bigram: ["The red", "red fox", "fox jumped", "jumped ."]
-
-            newTokens.append('--'.join(review[i : i + 2]))   # Generate the bigrams of the review text
-        
-        review.extend(newTokens)    # Add the new bigrams to the original review for easy computation
-        newTokens = []
-        
-    return reviewsList
-    
-def preProcess(filepath):
+def preProcess(filepath, resetScope=False, features=preprocess.DEFAULT_FEATURES, cache=None):
     """
     preProcess will process the data before we start training the data.
+    The reviews are streamed from the file one at a time, see sentiment.preprocess.
+    With a cache (a corpuscache.CorpusCache) the reviews come from the cache.
     """
-    
-    split = splitData(filepath) # Split into their own reviews
-    tokens = tokenData(split)   # Tokenize the reviews so we have unigrams
-    notHandlingData = notHandling(tokens)   # Do the not handling.
 
-    #bigram module here
-    corpus = bigram(notHandlingData)
+    if cache is not None:
+        with profiling.stage("preProcess"):
+            return cache.corpus(filepath, preprocess.TRAIN, resetScope, features)
 
-    return corpus
+    return profiling.iterate("preProcess", preprocess.preProcess(filepath, preprocess.TRAIN, resetScope, features))
         
-def main(filepath):
+def main(filepath, outputPath=None, fileFormat="text", workers=1, snapshotPath=None, snapshot=None, useNumpy=True, resetScope=False, features=preprocess.DEFAULT_FEATURES, prune=pruning.NO_PRUNING, reportPath=None, smoothing=1, cache=None):
+
+    if outputPath is None:
+        outputPath = "sentiment-decision-list.bin" if fileFormat == "binary" else "sentiment-decision-list.txt"
+
+    with profiling.stage("getNgramCounts"):
+        if snapshot is not None:
+            ngrams, lengths, notHandlingFlag, features, resetScope = updateSnapshotCounts(filepath, snapshot, workers)  # Add to the loaded counts, only count the new reviews, with the snapshot's features and not handling
+        elif cache is not None:
+            corpus = preProcess(filepath, resetScope, features, cache) # The preprocessed reviews, from the cache if this file was preprocessed before
+            ngrams, notHandlingFlag = countCorpus(corpus), corpus.notHandlingFlag   # Counted from the cached token ids
+            lengths = {"pos": countLength("pos", ngrams), "neg": countLength("neg", ngrams)}
+        else:
+            ngrams, notHandlingFlag = countFile(filepath, workers, resetScope=resetScope, features=features)  # Preprocess the data and create the positive and negative ngrams (in worker processes with --workers)
+            lengths = {"pos": countLength("pos", ngrams), "neg": countLength("neg", ngrams)}
 
-    processedData = preProcess(filepath)    # Preprocess the data
+    if snapshotPath is not None:
+        saveSnapshot(snapshotPath, ngrams, lengths, notHandlingFlag, features, resetScope)   # Keep the counts so the next batch of reviews can be folded in
 
-    classifiedData = bundleData(processedData)  # Classify the data
-    ngrams = getNgramCounts(classifiedData) # Create the positive and negative ngrams
+    reviewVocab = ngrams.vocabulary(sort=True)   # Get the total corpus of unique words (the interned words of both classes), sorted so every run visits them in the same order
 
-    posVocab = list(ngrams['pos'].keys())   # Get the unique words in positive words
-    negVocab = list(ngrams['neg'].keys())   # Get the uniqie words in negative words
-    reviewVocab = list(set(posVocab).union(negVocab))   # Get the total corpus of unique words
+    profiling.items("getNgramCounts", len(reviewVocab))
 
-    posVocabLength = countLength("pos", ngrams) # Get the total number of positive vocab
-    negVocabLength = countLength("neg", ngrams) # Get the total number of negative vocab
+    rows = scoreCounts(ngrams, reviewVocab, lengths, smoothing, useNumpy)    # Classify, score and sort every word (with NumPy if it is installed)
 
-    reviewVocabLength = len(reviewVocab)    # Get the length of unique words
+    if reportPath is not None:  # Show what each level of pruning costs on the labelled reviews in reportPath
+        with profiling.stage("pruneReport"):
+            with contextlib.redirect_stdout(streams.reportStream(outputPath)):    # Not into the decision list when it goes to stdout
+                pruning.printReport(pruning.pruneReport(rows, ngrams, preProcess(reportPath, resetScope, features, cache), prune.defaultClass if prune.defaultClass is not None else priorClass(lengths)))
 
-    masterClassified = classify(reviewVocab, ngrams)    # Classify a word to be positive or negative depending on how many times it occurs in a review
+    with profiling.stage("prune"):
+        rows = pruning.pruneRows(rows, ngrams, prune)   # Drop the rules that do not pass the pruning thresholds
 
-    disList = createDecisionList(ngrams, reviewVocab, posVocabLength, negVocabLength, reviewVocabLength, masterClassified)    # Create the decisionList
+    model = DecisionListModel(rows, features, prune.defaultClass, priorClass(lengths))  # The decision list, with the class the training counts have more of
 
-    writeListToFile(disList)    # Write the decision list to the file as JSON data
+    model.save(outputPath, fileFormat)  # Write the decision list to the file
 
 
 if __name__ == "__main__":
 
-    filepath = sys.argv[1]  # Grab the filename of the training data
-
-    main(filepath)  # Run the program
+    parser = argparse.ArgumentParser(description="Train a sentiment decision list.")
+    parser.add_argument("filepath", help="the training data, can be compressed, '-' for stdin")  # Grab the filename of the training data
+    parser.add_argument("--format", dest="fileFormat", choices=["text", "binary"], default="text", help="write the decision list as text or in the memory mapped binary format")
+    parser.add_argument("--output", dest="outputPath", help="where to write the decision list (default sentiment-decision-list.txt or .bin), a text list can go to '-' for stdout or be compressed with .gz/.bz2/.xz")
+    parser.add_argument("--workers", type=int, default=1, help="count the n-grams in this many worker processes")
+    parser.add_argument("--snapshot", dest="snapshotPath", help="save the n-gram counts here so later batches can be added with --update")
+    parser.add_argument("--update", action="store_true", help="add the reviews in filepath to the counts in --snapshot instead of training from scratch, with the --order, --hash-bits and --reset-not-scope of the snapshot")
+    parser.add_argument("--no-numpy", dest="useNumpy", action="store_false", help="score the decision list in plain Python even if NumPy is installed")
+    parser.add_argument("--reset-not-scope", dest="resetScope", action="store_true", help="do not let a 'not' at the end of one review carry over into the next review")
+    parser.add_argument("--order", type=int, help="use the n-grams up to this order (default 2 = unigrams and bigrams)")
+    parser.add_argument("--hash-bits", dest="hashBits", type=int, help="hash every feature into 2^HASH_BITS ids to bound the memory of the counts and the decision list")
+    parser.add_argument("--cache-dir", dest="cacheDir", nargs="?", const=corpuscache.DEFAULT_DIRECTORY, help="keep the preprocessed reviews in this cache directory (default {}) and reuse them on the next run".format(corpuscache.DEFAULT_DIRECTORY))
+    parser.add_argument("--cache-size", dest="cacheSize", type=int, default=corpuscache.DEFAULT_MAX_BYTES >> 20, help="the most MB the cache may take up, the least recently used entries go first")
+    parser.add_argument("--profile", dest="profilePath", nargs="?", const="-", help="write a JSON summary of the time and memory of every stage to this file (stderr without one), or set SENTIMENT_PROFILE")
+    parser.add_argument("--cprofile", dest="cprofilePath", help="also write a cProfile dump of the run here, or set SENTIMENT_CPROFILE")
+    parser.add_argument("--smoothing", type=float, default=1, help="the constant added to every count when scoring (1 = add-one smoothing)")
+    parser.add_argument("--min-count", dest="minCount", type=int, help="prune the rules for words seen fewer times than this")
+    parser.add_argument("--min-score", dest="minScore", type=float, help="prune the rules with a smaller absolute log ratio than this")
+    parser.add_argument("--top-k", dest="topK", type=int, help="keep only this many rules")
+    parser.add_argument("--default-class", dest="defaultClass", type=int, choices=[0, 1], help="the class of a review no rule of the pruned list matches")
+    parser.add_argument("--prune-report", dest="reportPath", help="labelled reviews (training format) to report the coverage and accuracy of each pruning level on")
+    args = parser.parse_args()
+
+    if args.update and args.snapshotPath is None:
+        parser.error("--update needs the --snapshot to update")
+    if (args.order is not None and args.order < 1) or (args.hashBits is not None and not 1 <= args.hashBits <= 32):
+        parser.error("--order must be at least 1 and --hash-bits between 1 and 32")
+    if args.cacheDir is not None and args.update:
+        parser.error("--update counts the new reviews on top of the snapshot, it does not use the --cache-dir")
+    if args.smoothing <= 0:
+        parser.error("--smoothing must be above 0")
+    if args.fileFormat == "binary" and args.outputPath is not None and (streams.isStdio(args.outputPath) or os.path.splitext(args.outputPath)[1] in streams.COMPRESSORS):
+        parser.error("the binary decision list is memory mapped, it has to be an uncompressed file")
+    if args.workers > 1 and not streams.isPlainFile(args.filepath):
+        parser.error("--workers seeks to shards of the training file, it has to be an uncompressed file")
+    if args.cacheDir is not None and streams.isStdio(args.filepath):
+        parser.error("--cache-dir hashes the training file before reading it, it has to be a file")
+    if args.cacheDir is not None and args.workers > 1:
+        parser.error("--cache-dir counts the n-grams of the cached reviews in this process, it cannot be used with --workers")
+
+    snapshot = loadSnapshot(args.snapshotPath) if args.update else None    # The counts to add to, and how they were counted
+
+    if snapshot is not None:
+        snapshotFeatures, snapshotScope = snapshot[3:]
+        if (args.order is not None and args.order != snapshotFeatures.order) or (args.hashBits is not None and args.hashBits != snapshotFeatures.hashBits):
+            parser.error("the snapshot was counted with --order {} and {}, --update counts the new reviews the same way".format(snapshotFeatures.order, "--hash-bits {}".format(snapshotFeatures.hashBits) if snapshotFeatures.hashBits else "no --hash-bits"))
+        if args.resetScope and not snapshotScope:
+            parser.error("the snapshot was counted without --reset-not-scope, --update counts the new reviews the same way")
+
+    features = preprocess.Features(order=args.order or preprocess.DEFAULT_FEATURES.order, hashBits=args.hashBits)
+    cache = corpuscache.CorpusCache(args.cacheDir, args.cacheSize << 20) if args.cacheDir is not None else None
+    prune = pruning.Pruning(minCount=args.minCount, minScore=args.minScore, topK=args.topK, defaultClass=args.defaultClass)
+
+    with profiling.session("train", args.profilePath, args.cprofilePath):
+        main(args.filepath, args.outputPath, args.fileFormat, args.workers, args.snapshotPath, snapshot, args.useNumpy, args.resetScope, features, prune, args.reportPath, args.smoothing, cache)  # Run the program
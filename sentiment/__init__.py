@@ -0,0 +1,18 @@
+"""
+Shared code for the decision list sentiment analysis scripts.
+
+The decision-list-*.py scripts are the entry points, this package holds the pieces they have in common.
+Python programs can train and classify in-process with DecisionListModel (sentiment.model).
+"""
+
+def __getattr__(name):
+    """
+    sentiment.DecisionListModel, imported when it is first used so 'python3 -m sentiment.listfile' does not import
+    the listfile module twice.
+    """
+
+    if name == "DecisionListModel":
+        from sentiment.model import DecisionListModel
+        return DecisionListModel
+
+    raise AttributeError("module 'sentiment' has no attribute {!r}".format(name))
@@ -0,0 +1,196 @@
+"""
+Aho-Corasick matching of the decision list rules against the words of a review.
+
+classifier.matchReview() needs the review with its n-grams already added: every bigram (and trigram, ...) is
+joined into a new string just so it can be looked up. RuleAutomaton instead compiles the rules into a trie over
+words, each rule split back into its words, and adds the Aho-Corasick failure links. A review is then scanned
+once, one transition per word, and the n-grams are never built. Every state keeps the lowest rank of the rules
+that end there or at any state its failure links lead to, so the scan only has to keep the lowest rank it has seen,
+however long the rules are.
+
+The words are joined by preprocess.NGRAM_JOIN, which can also be inside a word ('--' is a token of its own in the
+reviews), so a rule goes into the trie once for every way it splits into at most order words. It then matches
+exactly the reviews the lookup of the joined n-grams would.
+
+Hashed features are not made of words any more, a hashed decision list cannot be compiled.
+"""
+
+import sys
+from itertools import islice
+
+from sentiment import classifier, preprocess
+
+ROOT = 0
+NO_RULE = float("inf")  # The best rank of a state no rule ends at.
+EMPTY = {}  # The transitions of every state without any, never written to.
+
+def ruleWords(rule, order):
+    """
+    Yield every way of splitting the rule into 1 to order words at the joins.
+    """
+
+    yield (rule,)
+
+    if order < 2:
+        return
+
+    join = preprocess.NGRAM_JOIN
+    position = rule.find(join, 1)   # A word is never empty, so a join at the start is part of the first word.
+
+    while position != -1 and position + len(join) < len(rule):
+        for rest in ruleWords(rule[position + len(join):], order - 1):
+            yield (rule[:position],) + rest
+        position = rule.find(join, position + 1)    # Joins can overlap ('---' is '-' + '--' or '--' + '-')
+
+class RuleAutomaton:
+    """
+    The rules of a decision list as an Aho-Corasick automaton over words.
+    """
+
+    def __init__(self, decisionList, order=preprocess.DEFAULT_FEATURES.order):
+
+        self.classes = classifier.ruleClasses(decisionList)
+
+        self.transitions = [EMPTY]  # state -> {word: next state}
+        self.ranks = [NO_RULE]  # state -> the lowest rank of a rule that ends at the state
+
+        for rank in range(len(decisionList)):
+            for words in set(ruleWords(decisionList[rank][0], order)):
+                state = ROOT
+                for word in words:
+                    state = self.child(state, sys.intern(word)) # One copy of every word, however many rules it is in
+                self.ranks[state] = min(self.ranks[state], rank) # The first (highest ranked) copy of a rule wins, like the index.
+
+        self.bestByClass = None
+        self.link()
+
+    def child(self, state, word):
+        """
+        The state after word from state, added to the trie if it is not there yet.
+        """
+
+        if self.transitions[state] is EMPTY:
+            self.transitions[state] = {}
+
+        nextState = self.transitions[state].get(word)
+
+        if nextState is None:
+            nextState = self.transitions[state][word] = len(self.ranks)
+            self.transitions.append(EMPTY)
+            self.ranks.append(NO_RULE)
+
+        return nextState
+
+    def link(self):
+        """
+        Add the failure links breadth first, and fold the ranks along them into the best rank of every state.
+        """
+
+        self.fail = [ROOT] * len(self.ranks)
+        self.best = list(self.ranks)
+        self.order = []    # Every state but the root, breadth first
+
+        queue = self.order
+        queue.extend(self.transitions[ROOT].values())
+
+        for state in queue: # The queue grows as it is read, the states come out in order of depth.
+            for word, nextState in self.transitions[state].items():
+                fallback = self.fail[state]
+                while fallback != ROOT and word not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+
+                target = self.transitions[fallback].get(word, ROOT)
+                self.fail[nextState] = target   # The longest proper suffix of nextState's words that is in the trie
+
+                self.best[nextState] = min(self.best[nextState], self.best[target])
+
+                queue.append(nextState)
+
+    def explainRanks(self):
+        """
+        The best rank of each class at every state, only explain() needs them so they are folded along the failure
+        links the first time it runs.
+        """
+
+        if self.bestByClass is None:
+            bestByClass = [() if rank == NO_RULE else (rank,) for rank in self.ranks]
+
+            for state in self.order:    # A state's failure link is never deeper, so it is already folded.
+                bestByClass[state] = self.firstByClass(bestByClass[state] + bestByClass[self.fail[state]])
+
+            self.bestByClass = bestByClass
+
+        return self.bestByClass
+
+    def firstByClass(self, ranks):
+        """
+        The lowest of the ranks for each class, in rank order.
+        """
+
+        firstRanks = {}
+
+        for rank in ranks:
+            if rank < firstRanks.get(self.classes[rank], NO_RULE):
+                firstRanks[self.classes[rank]] = rank
+
+        return tuple(sorted(firstRanks.values()))
+
+    def states(self, review):
+        """
+        Yield the state after every word of the review. The first token (the label or the filename) is a unigram of
+        its own and not part of any n-gram, so it is looked up on its own.
+        """
+
+        transitions = self.transitions
+        fail = self.fail
+
+        if review:
+            yield transitions[ROOT].get(review[0], ROOT)
+
+        state = ROOT
+
+        for word in islice(review, 1, None):
+            nextState = transitions[state].get(word)
+            while nextState is None and state != ROOT:  # Follow the failure links to the longest suffix that goes on with word
+                state = fail[state]
+                nextState = transitions[state].get(word)
+            state = ROOT if nextState is None else nextState
+            yield state
+
+    def match(self, review):
+        """
+        Return the rank of the first rule in the decision list that appears in the review, or None if no rule matches.
+        The review has been through the not handling but has no n-grams, like preprocess.normalize() gives it.
+        This is states() and the lowest best rank in one loop, it runs once for every word.
+        """
+
+        if not review:
+            return None
+
+        transitions = self.transitions
+        fail = self.fail
+        best = self.best
+
+        bestRank = best[transitions[ROOT].get(review[0], ROOT)]
+        state = ROOT
+
+        for word in islice(review, 1, None):
+            nextState = transitions[state].get(word)
+            while nextState is None and state != ROOT:
+                state = fail[state]
+                nextState = transitions[state].get(word)
+            state = ROOT if nextState is None else nextState
+            if best[state] < bestRank:
+                bestRank = best[state]
+
+        return None if bestRank == NO_RULE else bestRank
+
+    def explain(self, review):
+        """
+        Return (rank, opposingRank) like classifier.explainReview(), from the same scan.
+        """
+
+        bestByClass = self.explainRanks()
+        ranks = self.firstByClass([rank for state in self.states(review) for rank in bestByClass[state]])
+
+        return (ranks[0] if ranks else None), (ranks[1] if len(ranks) > 1 else None)
@@ -0,0 +1,159 @@
+"""
+Batch classification engine.
+
+A batch of reviews becomes a sparse reviews x rules matrix in CSR form: row i holds the ids of the rules that
+appear in review i, and a rule's id is its rank in the decision list. The first matching rule of every review is
+then a row-wise minimum over the matrix (numpy.minimum.reduceat on the CSR indices), and the labels of the
+whole batch are one lookup into the array of rule classes. explainBatch() takes the row-wise minimum once per
+class instead, which gives the first matching rule and the first rule of the other class in the same pass.
+
+NumPy is optional, without it every review goes through classifier.matchReview() one at a time.
+"""
+
+from itertools import islice
+
+from sentiment import classifier
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NO_MATCH = -1
+
+def batches(data, batchSize):
+    """
+    Group the reviews in data into lists of batchSize reviews.
+    """
+
+    data = iter(data)
+
+    while True:
+        batch = list(islice(data, batchSize))
+        if not batch:
+            return
+        yield batch
+
+class BatchClassifier:
+    """
+    Classify whole batches of reviews against one decision list.
+    """
+
+    def __init__(self, decisionList, defaultClass=None):
+
+        self.ruleIndex = classifier.buildRuleIndex(decisionList)
+        self.noMatch = NO_MATCH if defaultClass is None else defaultClass   # The label of a review no rule matches.
+        self.coverage = classifier.Coverage()   # The reviews classified so far and how many of them no rule matched.
+        self.classes = classifier.ruleClasses(decisionList)
+
+        if numpy is not None:
+            self.classes = numpy.array(self.classes, dtype=numpy.int8)
+
+    def ruleMatrix(self, reviews):
+        """
+        Build the CSR (indptr, indices) of the reviews x rules matrix, the rule ids of each row are the ranks of the
+        rules found in that review.
+        """
+
+        indptr = numpy.zeros(len(reviews) + 1, dtype=numpy.int64)
+        indices = []
+
+        get = self.ruleIndex.get
+
+        for row, review in enumerate(reviews):
+            indices.extend(rank for rank in map(get, set(review)) if rank is not None)
+            indptr[row + 1] = len(indices)
+
+        return indptr, numpy.array(indices, dtype=numpy.int64)
+
+    def classifyBatch(self, reviews):
+        """
+        Return the label of every review in the batch, a review with no rule in it gets the default class or NO_MATCH.
+        """
+
+        self.coverage.reviews += len(reviews)
+
+        if numpy is None:
+            labels = []
+            for review in reviews:
+                rank = classifier.matchReview(self.ruleIndex, review)
+                labels.append(self.noMatch if rank is None else self.classes[rank])
+                self.coverage.unmatched += rank is None
+            return labels
+
+        labels = numpy.full(len(reviews), self.noMatch, dtype=numpy.int8)
+
+        indptr, indices = self.ruleMatrix(reviews)
+
+        matched = indptr[1:] > indptr[:-1]  # reduceat gives garbage for empty rows, so only rows with a hit are reduced.
+        self.coverage.unmatched += len(reviews) - int(matched.sum())
+
+        if matched.any():
+            firstRules = numpy.minimum.reduceat(indices, indptr[:-1][matched])    # The lowest rank in each row is its first matching rule.
+            labels[matched] = self.classes[firstRules]
+
+        return labels.tolist()
+
+    def matchBatch(self, reviews):
+        """
+        Return the rank of the first rule in every review of the batch, None for a review with no rule in it.
+        """
+
+        self.coverage.reviews += len(reviews)
+
+        if numpy is None or len(reviews) == 1:  # One review is not worth a matrix.
+            ranks = [classifier.matchReview(self.ruleIndex, review) for review in reviews]
+            self.coverage.unmatched += ranks.count(None)
+            return ranks
+
+        ranks = [None] * len(reviews)
+
+        indptr, indices = self.ruleMatrix(reviews)
+
+        matched = indptr[1:] > indptr[:-1]
+        self.coverage.unmatched += len(reviews) - int(matched.sum())
+
+        if matched.any():
+            firstRules = numpy.minimum.reduceat(indices, indptr[:-1][matched]).tolist()
+
+            for row, rank in zip(numpy.flatnonzero(matched).tolist(), firstRules):
+                ranks[row] = rank
+
+        return ranks
+
+    def explainBatch(self, reviews):
+        """
+        Return (rank, opposingRank) for every review in the batch, like classifier.explainReview().
+        """
+
+        self.coverage.reviews += len(reviews)
+
+        if numpy is None:
+            explained = [classifier.explainReview(self.ruleIndex, self.classes, review) for review in reviews]
+            self.coverage.unmatched += sum(rank is None for rank, opposingRank in explained)
+            return explained
+
+        explained = [(None, None)] * len(reviews)
+
+        indptr, indices = self.ruleMatrix(reviews)
+
+        matched = indptr[1:] > indptr[:-1]
+        self.coverage.unmatched += len(reviews) - int(matched.sum())
+
+        if not matched.any():
+            return explained
+
+        noRule = len(self.classes)  # Past the last rank, stands in for "no rule of this class".
+        hitClasses = self.classes[indices]
+        starts = indptr[:-1][matched]
+
+        firstPos = numpy.minimum.reduceat(numpy.where(hitClasses == 1, indices, noRule), starts)
+        firstNeg = numpy.minimum.reduceat(numpy.where(hitClasses == 0, indices, noRule), starts)
+
+        firstRules = numpy.minimum(firstPos, firstNeg).tolist()
+        opposingRules = numpy.maximum(firstPos, firstNeg).tolist()
+
+        for row, rank, opposing in zip(numpy.flatnonzero(matched).tolist(), firstRules, opposingRules):
+            explained[row] = (rank, None if opposing == noRule else opposing)
+
+        return explained
@@ -0,0 +1,205 @@
+"""
+Decision list lookups shared by everything that classifies reviews.
+
+A decision list is a list of [rule, class] rows in rank order. buildRuleIndex() maps every rule to its rank,
+and matchReview() finds the first rule of the list that is in a review by looking up the review's own tokens.
+explainReview() does the same lookup but also keeps the first rule of the other class, to explain the decision,
+and explanation() writes it as a line of the explanation file.
+
+A review no rule matches still gets an answer: fallbackClass() picks the class it gets, and Coverage counts how
+many reviews needed it.
+"""
+
+from sentiment import listfile, preprocess
+
+EXPLAIN_HEADER = "filename label rule rank score opposing_rule opposing_rank opposing_score\n"
+
+def openList(filename, keepScores=False):
+    """
+    Open the decision list and append it to a list.
+    With keepScores the rows are [rule, class, score] instead of [rule, class].
+    """
+
+    decList = []
+
+    data = preprocess.splitData(filename)  # Split the data by new line for easy comprehension
+
+    for line in data:
+        line = line.split() # Split the line by space to seperate the word class and classifier
+        if listfile.isHeader(line):   # Not a rule, it says how the list was built.
+            continue
+        if keepScores:
+            line[2] = float(line[2])    # Keep the log value to explain the decisions
+        else:
+            del line[2] # Remove the log value, we dont need it. List is already in order
+        decList.append(line)    # Append the line to the decision list
+
+    return decList
+
+def loadList(filename, keepScores=False):
+    """
+    Load a text or binary decision list, a binary list is memory mapped instead of parsed.
+    A binary list always has its scores, a text list only keeps them with keepScores.
+    """
+
+    if listfile.isBinaryList(filename):
+        return listfile.BinaryDecisionList(filename)
+
+    return openList(filename, keepScores)
+
+def listFeatures(filename):
+    """
+    The features (n-gram order and hashing) a decision list was trained with, reviews have to be preprocessed the same way.
+    """
+
+    return listfile.readFeatures(filename)
+
+def listDefaultClass(filename):
+    """
+    The class of a review no rule matches, if the decision list was pruned with a default class, otherwise None.
+    """
+
+    return listfile.readHeader(filename)[1]
+
+def listPriorClass(filename):
+    """
+    The class with the most n-grams in the counts the decision list was trained on, None for a list written before it was recorded.
+    """
+
+    return listfile.readHeader(filename)[2]
+
+def fallbackClass(filename, defaultClass=None):
+    """
+    The class of a review no rule matches and where it came from, as (class, source): defaultClass if it is given,
+    otherwise the list's default class, otherwise its prior class. (None, None) if the list has neither.
+    """
+
+    features, listDefault, prior, stamp = listfile.readHeader(filename)
+
+    return chooseFallback(defaultClass, listDefault, prior)
+
+def chooseFallback(defaultClass, listDefault, prior):
+    """
+    fallbackClass() of a list whose default and prior class are already known.
+    """
+
+    for classVal, source in ((defaultClass, "--default-class"), (listDefault, "the default class of the list"), (prior, "the prior class of the list")):
+        if classVal is not None:
+            return classVal, source
+
+    return None, None
+
+class Coverage:
+    """
+    How many of the reviews classified matched a rule, the rest got the fallback class.
+    """
+
+    def __init__(self, reviews=0, unmatched=0):
+
+        self.reviews = reviews
+        self.unmatched = unmatched
+
+    def add(self, other):
+
+        self.reviews += other.reviews
+        self.unmatched += other.unmatched
+
+    @property
+    def matched(self):
+        return self.reviews - self.unmatched
+
+    def summary(self, fallback=None, source=None):
+        """
+        The coverage line printed after classifying.
+        """
+
+        line = "Coverage: {} of {} reviews matched a rule ({:.4f})".format(self.matched, self.reviews, self.matched / self.reviews if self.reviews else 0.0)
+
+        if fallback is not None:
+            line += ", {} got class {} from {}".format(self.unmatched, fallback, source)
+
+        return line
+
+def ruleClasses(decisionList):
+    """
+    The class of every rule as an int, in rank order.
+    """
+
+    if isinstance(decisionList, listfile.BinaryDecisionList):
+        return [decisionList.ruleClass(rank) for rank in range(len(decisionList))]
+
+    return [int(row[1]) for row in decisionList]
+
+def ruleScore(decisionList, rank):
+    """
+    The log score of the rule at rank, the text list has to be loaded with keepScores.
+    """
+
+    if isinstance(decisionList, listfile.BinaryDecisionList):
+        return decisionList.score(rank)
+
+    return decisionList[rank][2]
+
+def buildRuleIndex(decisionList):
+    """
+    Build a rule -> rank lookup so each review only has to check its own tokens against the decision list.
+    """
+
+    if isinstance(decisionList, listfile.BinaryDecisionList):   # The binary list already carries its own hash index.
+        return decisionList
+
+    ruleIndex = {}
+
+    for rank in range(len(decisionList)):
+        if decisionList[rank][0] not in ruleIndex:  # Keep the first (highest ranked) copy of a rule, just like the list scan would.
+            ruleIndex[decisionList[rank][0]] = rank
+
+    return ruleIndex
+
+def matchReview(ruleIndex, review):
+    """
+    Return the rank of the first rule in the decision list that appears in the review, or None if no rule matches.
+    """
+
+    bestRank = None
+
+    for token in set(review):   # Each unique token is looked up once instead of scanning the whole decision list.
+        rank = ruleIndex.get(token)
+        if rank is not None and (bestRank is None or rank < bestRank):  # The lowest rank is the rule the list scan would have hit first.
+            bestRank = rank
+
+    return bestRank
+
+def explainReview(ruleIndex, classes, review):
+    """
+    Return (rank, opposingRank): the rank of the first rule in the decision list that appears in the review and the
+    rank of the first rule of the other class that does, each None if there is no such rule.
+    """
+
+    bestRanks = {}  # The lowest rank seen for each class.
+
+    for token in set(review):   # The same single pass over the review as matchReview.
+        rank = ruleIndex.get(token)
+        if rank is not None and rank < bestRanks.get(classes[rank], rank + 1):
+            bestRanks[classes[rank]] = rank
+
+    ranks = sorted(bestRanks.values())
+
+    return (ranks[0] if ranks else None), (ranks[1] if len(ranks) > 1 else None)
+
+def describeRule(decisionList, rank):
+    """
+    The rule, rank and score columns of the explanation file for the rule at rank.
+    """
+
+    if rank is None:
+        return "- - -"
+
+    return "{} {} {:.4f}".format(decisionList[rank][0], rank, ruleScore(decisionList, rank))
+
+def explanation(decisionList, review, label, rank, opposingRank):
+    """
+    One line of the explanation file.
+    """
+
+    return "{} {} {} {}\n".format(review[0], label, describeRule(decisionList, rank), describeRule(decisionList, opposingRank))
@@ -0,0 +1,215 @@
+"""
+On-disk cache of preprocessed corpora.
+
+Preprocessing (splitData -> tokenData -> notHandling -> ngrams) gives the same reviews every time it is run on the
+same file with the same settings. The cache keeps them in a binary file that later runs memory map instead:
+
+    header      magic, version, byte order, not handling flag at the end of the file,
+                review count, token count, vocabulary size, vocabulary bytes
+    tokens      uint32 * tokens          every review's tokens as ids into the vocabulary, the label or filename first
+                (padded to a multiple of 8 bytes)
+    reviews     uint64 * (reviews + 1)   where each review starts in the token ids
+    vocabulary  utf-8 tokens joined by '\\n', in id order
+
+The token ids come first so they can be written out as the file is preprocessed, and only the offsets and the
+vocabulary are held in memory until the end.
+
+An entry is keyed by the hash of the input file's contents and the preprocessing settings (mode, resetScope and
+features), so a changed file or different settings never hit an old entry. Entries are written to a temporary file
+and renamed, and every hit touches the entry's mtime. When the cache grows past its size cap, the entries used
+least recently are deleted first.
+
+Bump VERSION when the preprocessing changes, so the old entries stop matching.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from sentiment import preprocess, streams
+
+MAGIC = b"SDLC"
+VERSION = 3
+
+HEADER = struct.Struct("<4sHBBQQQQ")   # magic, version, byte order, not handling flag, reviews, tokens, vocabulary size, vocabulary bytes
+
+BYTE_ORDERS = {"little": 0, "big": 1}
+
+SUFFIX = ".corpus"
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "sentiment-decision-list")
+DEFAULT_MAX_BYTES = 1 << 30 # 1GB
+
+HASH_BLOCK = 1 << 20
+FLUSH_TOKENS = 1 << 20  # Token ids are written out a million at a time.
+
+def fileHash(filepath):
+    """
+    The blake2b hash of the file's contents, read a block at a time.
+    """
+
+    digest = hashlib.blake2b(digest_size=20)
+
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+def configKey(mode, resetScope, features):
+    return "v{} {} resetScope={} order={} hashBits={}".format(VERSION, mode, bool(resetScope), features.order, features.hashBits)
+
+def writeCorpus(reviews, filepath):
+    """
+    Intern the tokens of the (review, notHandlingFlag) pairs and write them in the cache format.
+    """
+
+    index = {}
+    tokens = array("I")
+    offsets = array("Q", [0])
+    written = 0 # Token ids already in the file
+    notHandlingFlag = False
+
+    intern = lambda token: index.setdefault(token, len(index))  # The id of a new token is the number of tokens before it.
+
+    with streams.replacing(filepath) as temporary, open(temporary, "wb") as f:   # Renamed over the entry once it is all written
+        f.write(bytes(HEADER.size)) # The header is filled in once the counts are known.
+
+        for review, notHandlingFlag in reviews:
+            tokens.extend(map(intern, review))
+            offsets.append(written + len(tokens))
+
+            if len(tokens) >= FLUSH_TOKENS:
+                tokens.tofile(f)
+                written += len(tokens)
+                tokens = array("I")
+
+        tokens.tofile(f)
+        written += len(tokens)
+
+        f.write(bytes(4 * (written % 2)))   # Pad so the offsets are 8 byte aligned.
+        offsets.tofile(f)
+
+        vocabulary = "\n".join(index).encode("utf-8")  # Tokens never hold whitespace, dicts keep the insertion (id) order.
+        f.write(vocabulary)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, BYTE_ORDERS[sys.byteorder], notHandlingFlag, len(offsets) - 1, written, len(index), len(vocabulary)))
+
+class CachedCorpus:
+    """
+    A memory mapped preprocessed corpus. Iterating it gives the reviews preprocess.preProcess() would have.
+    """
+
+    def __init__(self, filepath):
+
+        with open(filepath, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, byteOrder, notHandlingFlag, self.reviewCount, tokenCount, vocabularySize, vocabularyBytes = HEADER.unpack_from(self.buffer, 0)
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a version {} corpus cache".format(filepath, VERSION))
+        if byteOrder != BYTE_ORDERS[sys.byteorder]:
+            raise ValueError("{} was written on a machine with a different byte order".format(filepath))
+
+        view = memoryview(self.buffer)
+        position = HEADER.size
+
+        self.tokens = view[position : position + 4 * tokenCount].cast("I")
+        position += 4 * (tokenCount + tokenCount % 2)
+
+        self.offsets = view[position : position + 8 * (self.reviewCount + 1)].cast("Q")
+        position += 8 * (self.reviewCount + 1)
+
+        self.vocabulary = str(view[position : position + vocabularyBytes], "utf-8").split("\n") if vocabularySize else []
+        self.notHandlingFlag = bool(notHandlingFlag)
+
+    def __len__(self):
+        return self.reviewCount
+
+    def review(self, i):
+        """
+        The tokens of review i, as a new list.
+        """
+
+        return list(map(self.vocabulary.__getitem__, self.tokens[self.offsets[i] : self.offsets[i + 1]]))
+
+    def __iter__(self):
+        for i in range(self.reviewCount):
+            yield self.review(i)
+
+    def close(self):
+
+        for view in (self.offsets, self.tokens):
+            view.release()
+        self.buffer.close()
+
+class CorpusCache:
+    """
+    A directory of cached corpora, at most maxBytes big.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, maxBytes=DEFAULT_MAX_BYTES):
+
+        self.directory = directory
+        self.maxBytes = maxBytes
+
+    def path(self, filepath, mode, resetScope, features):
+        """
+        Where the entry for this file and these settings lives.
+        """
+
+        key = hashlib.blake2b("{} {}".format(fileHash(filepath), configKey(mode, resetScope, features)).encode("utf-8"), digest_size=20).hexdigest()
+
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def corpus(self, filepath, mode=preprocess.TRAIN, resetScope=False, features=preprocess.DEFAULT_FEATURES):
+        """
+        The preprocessed corpus of filepath, from the cache if it is there, otherwise preprocessed and cached.
+        """
+
+        entry = self.path(filepath, mode, resetScope, features)
+
+        if not os.path.exists(entry):
+            os.makedirs(self.directory, exist_ok=True)
+            writeCorpus(preprocess.preProcessFlags(filepath, mode, resetScope, features), entry)
+        else:
+            os.utime(entry)   # Used now, it goes to the back of the eviction queue.
+
+        self.evict(keep=entry)
+
+        return CachedCorpus(entry)
+
+    def evict(self, keep=None):
+        """
+        Delete the least recently used entries until the cache fits in maxBytes. keep is never deleted.
+        """
+
+        entries = []
+
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:   # Another run evicted it first.
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        size = sum(entrySize for mtime, entrySize, path in entries)
+
+        for mtime, entrySize, path in sorted(entries):  # Oldest first
+            if size <= self.maxBytes:
+                break
+            if path == keep:
+                continue
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:   # Another run evicted it first.
+                pass
+            size -= entrySize
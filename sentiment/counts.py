@@ -0,0 +1,523 @@
+"""
+N-gram counting for the trainer, serial or split over worker processes.
+
+The parallel path splits the training file into byte ranges on line boundaries (preprocess.shardOffsets),
+counts each shard in its own process and merges the per class counts with a tree reduction.
+
+The not handling flag carries over from one review to the next, so the first reviews of a shard depend on
+how the previous shard ended. Each shard counts those leading reviews both ways (starting inside and outside
+of a 'not') until the two agree, and the merge picks the right one once the previous shard's flag is known.
+This keeps the counts identical to the serial path.
+
+The counts can be saved as a snapshot (saveSnapshot) and new labelled reviews folded into it later,
+so retraining only has to count the new reviews.
+
+The counts are InternedCounts: every n-gram gets an int id the first time it is seen, and the count of each class
+is an array('I') indexed by id. Each n-gram string is stored once, not once per class, and the vocabulary of both
+classes is just the interned words. counts["pos"] and counts["neg"] still read like the {n-gram: count} dicts
+the rest of the trainer was written against, an n-gram with a count of 0 in a class is not in that class.
+"""
+
+import json
+from array import array
+from collections.abc import MutableMapping
+from multiprocessing import Pool
+
+from sentiment import preprocess, profiling, streams
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CLASSES = ("pos", "neg")
+
+CORPUS_CHUNK_TOKENS = 1 << 22   # How many token ids of a cached corpus are counted at once.
+
+class ClassCounts(MutableMapping):
+    """
+    The {n-gram: count} view of one class of an InternedCounts.
+    """
+
+    def __init__(self, counts, key):
+
+        self.counts = counts
+        self.table = counts.tables[key]
+
+    def __getitem__(self, word):
+
+        value = self.table[self.counts.index[word]]
+        if not value:
+            raise KeyError(word)
+
+        return value
+
+    def get(self, word, default=None):
+
+        i = self.counts.index.get(word)
+        if i is None or not self.table[i]:
+            return default
+
+        return self.table[i]
+
+    def __contains__(self, word):
+
+        i = self.counts.index.get(word)
+
+        return i is not None and self.table[i] != 0
+
+    def __setitem__(self, word, value):
+        self.table[self.counts.intern(word)] = value
+
+    def __delitem__(self, word):
+
+        if word not in self:
+            raise KeyError(word)
+        self.table[self.counts.index[word]] = 0
+
+    def __iter__(self):
+        return (word for word, value in zip(self.counts.words, self.table) if value)
+
+    def __len__(self):
+        return len(self.table) - self.table.count(0)
+
+    def items(self):
+        return [(word, value) for word, value in zip(self.counts.words, self.table) if value]
+
+    def values(self):
+        return [value for value in self.table if value]
+
+class InternedCounts:
+    """
+    Per class n-gram counts over one interned vocabulary.
+    """
+
+    def __init__(self):
+
+        self.words = []  # id -> n-gram, ids are given out in the order the n-grams are first seen
+        self.wordIndex = {} # n-gram -> id, None until it is needed if the counts came from a cached corpus
+        self.tables = {key: array("I") for key in CLASSES}
+        self.sortedVocabulary = None    # (vocab, ids) of the last vocabulary(sort=True)
+
+    @property
+    def index(self):
+
+        if self.wordIndex is None:
+            self.wordIndex = {word: i for i, word in enumerate(self.words)}
+
+        return self.wordIndex
+
+    def __getitem__(self, key):
+        return ClassCounts(self, key)
+
+    def __eq__(self, other):
+        return all(dict(self[key].items()) == dict(other[key].items()) for key in CLASSES)
+
+    def intern(self, word):
+        """
+        The id of word, a new id with a count of 0 in every class if it was never seen.
+        """
+
+        i = self.index.get(word)
+
+        if i is None:
+            i = self.index[word] = len(self.words)
+            self.words.append(word)
+            for table in self.tables.values():
+                table.append(0)
+
+        return i
+
+    def count(self, key, tokens):
+        """
+        Add one to the count of every token in key's class.
+        """
+
+        index = self.index
+        words = self.words
+        table = self.tables[key]
+        tables = self.tables.values()
+
+        for token in tokens:
+            i = index.get(token)
+
+            if i is None:   # intern(), inlined for the hot loop
+                i = index[token] = len(words)
+                words.append(token)
+                for t in tables:
+                    t.append(0)
+
+            table[i] += 1
+
+    @classmethod
+    def fromCorpus(cls, corpus):
+        """
+        Count a cached training corpus (corpuscache.CachedCorpus) straight from its token id arrays with NumPy.
+        The corpus vocabulary is the interner, no n-gram is looked up and no review is rebuilt.
+        """
+
+        counts = cls()
+        counts.words = corpus.vocabulary
+        counts.wordIndex = None
+
+        tokens = numpy.frombuffer(corpus.tokens, dtype=numpy.uint32)
+        offsets = numpy.frombuffer(corpus.offsets, dtype=numpy.uint64).astype(numpy.int64)
+
+        negativeLabel = corpus.vocabulary.index("0") if "0" in corpus.vocabulary else -1
+        totals = {key: numpy.zeros(len(counts.words), dtype=numpy.int64) for key in CLASSES}
+
+        # Whole reviews at a time, about CORPUS_CHUNK_TOKENS tokens each, so the temporary arrays stay small.
+        bounds = numpy.unique(numpy.searchsorted(offsets, numpy.arange(0, offsets[-1], CORPUS_CHUNK_TOKENS)).tolist() + [len(offsets) - 1])
+
+        for first, last in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            starts = offsets[first:last]
+            lengths = offsets[first + 1 : last + 1] - starts
+            chunk = tokens[offsets[first] : offsets[last]]
+
+            starts = starts[lengths > 0] - offsets[first]
+            lengths = lengths[lengths > 0]
+
+            negative = numpy.repeat(chunk[starts] == negativeLabel, lengths)  # The first token of every review is its label, '0' is negative like in bundleData.
+            counted = numpy.ones(len(chunk), dtype=bool)
+            counted[starts] = False # The labels themselves are not counted.
+
+            totals["pos"] += numpy.bincount(chunk[counted & ~negative], minlength=len(counts.words))
+            totals["neg"] += numpy.bincount(chunk[counted & negative], minlength=len(counts.words))
+
+        for key in CLASSES:
+            counts.tables[key] = array("I", totals[key].astype(numpy.uint32).tobytes())
+
+        return counts
+
+    def merge(self, other):
+        """
+        Add the counts in other (InternedCounts or {class: {n-gram: count}} dicts) to these, and return these.
+        """
+
+        self.sortedVocabulary = None
+
+        if isinstance(other, InternedCounts):
+            ids = [self.intern(word) for word in other.words]   # other's id -> our id
+
+            for key in CLASSES:
+                table = self.tables[key]
+                for i, value in zip(ids, other.tables[key]):
+                    if value:
+                        table[i] += value
+
+            return self
+
+        for key in CLASSES:
+            table = self.tables[key]
+            for word, value in other[key].items():
+                table[self.intern(word)] += value
+
+        return self
+
+    def subtract(self, other):
+        """
+        New counts of these minus other, where other was counted from a part of the same reviews.
+        """
+
+        result = InternedCounts()
+        result.words = list(self.words)
+        result.wordIndex = None if self.wordIndex is None else dict(self.wordIndex)
+        result.tables = {key: array("I", self.tables[key]) for key in CLASSES}
+
+        for key in CLASSES:
+            table = result.tables[key]
+            for word, value in other[key].items():
+                table[result.index[word]] -= value
+
+        return result
+
+    def liveIds(self):
+        """
+        The ids of the n-grams with a count in either class.
+        """
+
+        pos = self.tables["pos"]
+        neg = self.tables["neg"]
+
+        if numpy is not None:
+            return numpy.flatnonzero(numpy.frombuffer(pos, dtype=numpy.uint32) | numpy.frombuffer(neg, dtype=numpy.uint32)).tolist()
+
+        return [i for i in range(len(self.words)) if pos[i] or neg[i]]
+
+    def vocabulary(self, sort=False):
+        """
+        Every n-gram with a count in either class, the union of the two classes' vocabularies.
+        With sort the n-grams are sorted, and countArrays() of that same list does not have to look them up.
+        """
+
+        words = self.words
+        ids = self.liveIds()
+
+        if sort:
+            ids.sort(key=words.__getitem__)
+
+        vocab = [words[i] for i in ids]
+
+        if sort:
+            self.sortedVocabulary = (vocab, ids)
+
+        return vocab
+
+    def countArrays(self, vocab):
+        """
+        The positive and negative counts of the words in vocab as NumPy arrays, in vocab order.
+        """
+
+        if self.sortedVocabulary is not None and self.sortedVocabulary[0] is vocab:
+            ids = numpy.array(self.sortedVocabulary[1], dtype=numpy.int64)
+        else:
+            ids = numpy.fromiter(map(self.index.__getitem__, vocab), dtype=numpy.int64, count=len(vocab))
+
+        return tuple(numpy.frombuffer(self.tables[key], dtype=numpy.uint32)[ids].astype(numpy.int64) for key in CLASSES)
+
+def newCounts():
+    return InternedCounts()
+
+def countsFromDicts(counts):
+    """
+    InternedCounts holding the counts of {class: {n-gram: count}} dicts.
+    """
+
+    return newCounts().merge(counts)
+
+def countCorpus(corpus):
+    """
+    Count a cached training corpus, from its token id arrays if NumPy is installed.
+    """
+
+    if numpy is not None:
+        return InternedCounts.fromCorpus(corpus)
+
+    return getNgramCounts(bundleData(corpus))
+
+def countsToDicts(counts):
+    """
+    The {class: {n-gram: count}} dicts of the counts, for JSON.
+    """
+
+    return {key: dict(counts[key].items()) for key in CLASSES}
+
+def bundleData(data):
+    """
+    bundleData will pair each review with its class, yielding ("pos", tokens) or ("neg", tokens)
+    """
+
+    for token in data: # If the token is in the negative review, it belongs to the negative class.
+        if(token[0]) == '0':
+            del token[0]
+            yield "neg", token
+        else:           # If the token is in the positive review, it belongs to the positive class.
+            del token[0]
+            yield "pos", token
+
+def getNgramCounts(data, ngramCount=None):
+    """
+    getNgramCounts will insert a token in their respective class and will gather a count of that token so we can
+    calculate the probability
+    """
+
+    if ngramCount is None:
+        ngramCount = newCounts() # Holds the counts of each word within a class.
+
+    if isinstance(ngramCount, InternedCounts):
+        for key, tokens in data:
+            ngramCount.count(key, tokens)
+        return ngramCount
+
+    for key, tokens in data:   # Reviews stream in one at a time, only the counts are kept.
+        for token in tokens:
+            if token not in ngramCount[key]:    # If the token is not in the dictionary, add it.
+                ngramCount[key][token] = 1
+            else:
+                ngramCount[key][token] += 1 # Add one to the value of token if it is already in there.
+
+    return ngramCount
+
+def mergeCounts(counts, other):
+    """
+    Add the counts in other to counts, and return counts.
+    """
+
+    if isinstance(counts, InternedCounts):
+        return counts.merge(other)
+
+    for key in CLASSES:
+        merged = counts[key]
+        for token, value in other[key].items():
+            merged[token] = merged.get(token, 0) + value
+
+    return counts
+
+def subtractCounts(counts, other):
+    """
+    Return new counts of counts minus other, where other was counted from a part of the same reviews.
+    Tokens whose count drops to 0 are left out, as if the reviews in other had never been counted.
+    """
+
+    if isinstance(counts, InternedCounts):
+        return counts.subtract(other)
+
+    result = {}
+
+    for key in CLASSES:
+        removed = other[key]
+        result[key] = {token: value - removed.get(token, 0) for token, value in counts[key].items() if value != removed.get(token, 0)}
+
+    return result
+
+def mergePair(pair):
+    return mergeCounts(pair[0], pair[1])
+
+def countReview(ngramCount, review, features=preprocess.DEFAULT_FEATURES):
+    """
+    Build the features of and count one review that has already been through the not handling.
+    """
+
+    getNgramCounts(bundleData([preprocess.featureReview(review, features)]), ngramCount)
+
+def countShard(task):
+    """
+    Count the reviews in one byte range of the training file.
+
+    Returns (counts, prefixCounts, flags):
+    counts is for the reviews that do not depend on the flag the shard starts with,
+    prefixCounts[startFlag] is for the leading reviews that do,
+    flags[startFlag] is the not handling flag at the end of the shard.
+    """
+
+    filepath, start, end, resetScope, features = task
+
+    counts = newCounts()
+    prefixCounts = {False: newCounts(), True: newCounts()}
+    flags = {}
+
+    reviews = preprocess.tokenData(preprocess.splitShard(filepath, start, end), preprocess.TRAIN)
+
+    for startFlag, review in preprocess.notHandlingShard(reviews, flags, resetScope):
+        countReview(counts if startFlag is None else prefixCounts[startFlag], review, features)
+
+    return counts, prefixCounts, flags
+
+def treeReduce(pool, parts):
+    """
+    Merge the count tables pairwise in the pool until only one is left.
+    """
+
+    while len(parts) > 1:
+        pairs = [(parts[i], parts[i + 1]) for i in range(0, len(parts) - 1, 2)]
+        merged = pool.map(mergePair, pairs)
+
+        if len(parts) % 2:  # The odd one out waits for the next round.
+            merged.append(parts[-1])
+
+        parts = merged
+
+    return parts[0] if parts else newCounts()
+
+def getNgramCountsParallel(filepath, workers, notHandlingFlag=False, resetScope=False, features=preprocess.DEFAULT_FEATURES):
+    """
+    Count the n-grams of the training file in filepath using workers processes.
+    Returns the counts and the not handling flag at the end of the file.
+    """
+
+    tasks = [(filepath, start, end, resetScope, features) for start, end in preprocess.shardOffsets(filepath, workers)]
+
+    with Pool(workers) as pool:
+        shards = pool.map(countShard, tasks)
+
+        parts = []
+
+        for counts, prefixCounts, flags in shards:
+            parts.append(mergeCounts(prefixCounts[notHandlingFlag], counts))   # Keep the prefix that matches how the previous shard ended.
+            notHandlingFlag = flags[notHandlingFlag]
+
+        return treeReduce(pool, parts), notHandlingFlag
+
+def countFile(filepath, workers=1, notHandlingFlag=False, resetScope=False, features=preprocess.DEFAULT_FEATURES):
+    """
+    Count the n-grams of the training file in filepath, in worker processes if workers > 1.
+    notHandlingFlag is the flag at the end of the reviews counted before this file, if any.
+    With resetScope the not handling starts over at every review (see preprocess.notHandling).
+    Returns the counts and the not handling flag at the end of the file.
+    """
+
+    if workers > 1:
+        return getNgramCountsParallel(filepath, workers, notHandlingFlag, resetScope, features)
+
+    ngramCount = newCounts()
+
+    reviews = preprocess.preProcessFlags(filepath, preprocess.TRAIN, resetScope, features, notHandlingFlag)
+
+    for review, notHandlingFlag in profiling.iterate("preProcess", reviews):
+        getNgramCounts(bundleData([review]), ngramCount)
+
+    return ngramCount, notHandlingFlag
+
+def classLength(ngramCount, key):
+    """
+    The total number of tokens counted for a class.
+    """
+
+    return sum(ngramCount[key].values())
+
+def priorClass(lengths):
+    """
+    The class with the most n-grams in the training counts, 1 (positive) on a tie.
+    """
+
+    return 1 if lengths["pos"] >= lengths["neg"] else 0
+
+SNAPSHOT_VERSION = 1
+
+def saveSnapshot(filepath, ngramCount, lengths, notHandlingFlag, features=preprocess.DEFAULT_FEATURES, resetScope=False):
+    """
+    Save the n-gram counts, the class token totals, the not handling flag, the features and whether a 'not' was
+    reset at every review, so training can be resumed the same way.
+    The snapshot is written to a temporary file and renamed, so a crash never leaves half a snapshot behind.
+    """
+
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "counts": countsToDicts(ngramCount),
+        "length": lengths,
+        "notHandlingFlag": notHandlingFlag,
+        "features": features._asdict(),
+        "resetScope": resetScope,
+    }
+
+    with streams.replacing(filepath) as temporary, open(temporary, "w") as f:
+        json.dump(snapshot, f)
+
+def loadSnapshot(filepath):
+    """
+    Load a snapshot written by saveSnapshot, returns (ngramCount, lengths, notHandlingFlag, features, resetScope).
+    """
+
+    with open(filepath) as f:
+        snapshot = json.load(f)
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError("{} is not a version {} count snapshot".format(filepath, SNAPSHOT_VERSION))
+
+    return countsFromDicts(snapshot["counts"]), snapshot["length"], snapshot["notHandlingFlag"], preprocess.Features(**snapshot["features"]), snapshot["resetScope"]
+
+def updateSnapshotCounts(filepath, snapshot, workers=1):
+    """
+    Fold the labelled reviews in filepath into the counts of a snapshot loaded with loadSnapshot.
+    The new reviews are counted with the same features and not handling as the snapshot was.
+    Returns the merged (ngramCount, lengths, notHandlingFlag, features, resetScope), the snapshot file is not rewritten.
+    """
+
+    ngramCount, lengths, notHandlingFlag, features, resetScope = snapshot
+
+    newCount, notHandlingFlag = countFile(filepath, workers, notHandlingFlag, resetScope, features)  # Only the new reviews are counted.
+
+    for key in CLASSES:
+        lengths[key] += classLength(newCount, key)
+
+    return mergeCounts(ngramCount, newCount), lengths, notHandlingFlag, features, resetScope
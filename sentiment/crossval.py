@@ -0,0 +1,137 @@
+"""
+K-fold cross-validation of the smoothing constant and the pruning thresholds.
+
+The training file is preprocessed once. Review i goes to fold i % folds, and the n-gram counts of each fold are
+kept, together with the labelled feature sets of its reviews. The counts to train on for fold f are the totals
+minus the counts of fold f (counts.subtractCounts), so nothing is recounted.
+
+One task scores the decision list of one fold with one smoothing constant, and classifies the held-out reviews of
+the fold at every pruning level in one lookup (pruning.ruleHits and pruning.levelCounts). The tasks run in worker
+processes. The folds are handed to the workers once when the pool starts, and not with every task.
+"""
+
+import itertools
+from multiprocessing import Pool
+
+from sentiment import preprocess, pruning, scoring
+from sentiment.counts import newCounts, mergeCounts, subtractCounts, getNgramCounts, bundleData, classLength, priorClass
+
+state = None    # (totals, foldCounts, heldOut, levels, defaultClass) of the cross-validation run, in every worker.
+
+def foldData(filepath, folds, resetScope=False, features=preprocess.DEFAULT_FEATURES, cache=None):
+    """
+    Preprocess the training file once, returns the counts of each fold and the (label, features) reviews of each fold.
+    With a cache (a corpuscache.CorpusCache) the preprocessed reviews come from the cache.
+    """
+
+    foldCounts = [newCounts() for fold in range(folds)]
+    heldOut = [[] for fold in range(folds)]
+
+    if cache is not None:
+        reviews = cache.corpus(filepath, preprocess.TRAIN, resetScope, features)
+    else:
+        reviews = preprocess.preProcess(filepath, preprocess.TRAIN, resetScope, features)
+
+    for i, review in enumerate(reviews):
+        fold = i % folds
+
+        label = 0 if review[0] == '0' else 1    # The same test bundleData uses.
+        getNgramCounts(bundleData([review]), foldCounts[fold])  # bundleData takes the label off the review.
+        heldOut[fold].append((label, frozenset(review)))   # Only which features a review has matters to the classifier.
+
+    return foldCounts, heldOut
+
+def sweepLevels(minCounts=(None,), minScores=(None,), topKs=(None,)):
+    """
+    Every combination of the pruning thresholds, as (level, Pruning) with the Pruning as its own level name.
+    """
+
+    levels = []
+
+    for minCount, minScore, topK in itertools.product(minCounts, minScores, topKs):
+        prune = pruning.NO_PRUNING._replace(minCount=minCount, minScore=minScore, topK=topK)
+        levels.append((prune, prune))
+
+    return levels
+
+def initWorker(runState):
+    global state
+    state = runState
+
+def runFold(task):
+    """
+    Train on every fold but one with one smoothing constant, and classify the held-out fold at every pruning level.
+    Returns (fold, smoothing, [(level, rules, covered, correct)], reviews).
+    """
+
+    fold, smoothing = task
+    totals, foldCounts, heldOut, levels, defaultClass = state
+
+    ngrams = subtractCounts(totals, foldCounts[fold])
+    vocab = ngrams.vocabulary(sort=True)
+
+    lengths = {"pos": classLength(ngrams, "pos"), "neg": classLength(ngrams, "neg")}
+    rows = scoring.decisionListRows(ngrams, vocab, lengths["pos"], lengths["neg"], smoothing)
+
+    if defaultClass is None:    # Like the trained model, fall back to the class the fold's training counts have more of.
+        defaultClass = priorClass(lengths)
+
+    hits = pruning.ruleHits(rows, heldOut[fold])
+
+    return fold, smoothing, list(pruning.levelCounts(rows, ngrams, hits, levels, defaultClass)), len(hits)
+
+def crossValidate(filepath, folds=5, smoothings=(1,), levels=None, defaultClass=None, workers=1, resetScope=False, features=preprocess.DEFAULT_FEATURES, cache=None):
+    """
+    Cross-validate every smoothing constant with every pruning level.
+    Returns [(smoothing, pruning, rules, coverage, accuracy)], rules is the average size of the pruned lists and the
+    coverage and accuracy are over all the held-out reviews of all the folds.
+    """
+
+    if levels is None:
+        levels = sweepLevels()
+
+    foldCounts, heldOut = foldData(filepath, folds, resetScope, features, cache)
+
+    if sum(map(len, heldOut)) < folds:
+        raise ValueError("{} has fewer reviews than the {} folds".format(filepath, folds))
+
+    totals = newCounts()
+    for counts in foldCounts:
+        mergeCounts(totals, counts)
+
+    runState = (totals, foldCounts, heldOut, levels, defaultClass)
+    tasks = [(fold, smoothing) for smoothing in smoothings for fold in range(folds)]
+
+    if workers > 1:
+        with Pool(workers, initializer=initWorker, initargs=(runState,)) as pool:
+            results = pool.map(runFold, tasks)
+    else:
+        initWorker(runState)
+        results = list(map(runFold, tasks))
+
+    totalsByConfig = {}    # (smoothing, level index) -> [rules, covered, correct, reviews] summed over the folds
+
+    for fold, smoothing, counts, reviews in results:
+        for index, (level, rules, covered, correct) in enumerate(counts):
+            total = totalsByConfig.setdefault((smoothing, index), [0, 0, 0, 0])
+            total[0] += rules
+            total[1] += covered
+            total[2] += correct
+            total[3] += reviews
+
+    table = []
+
+    for smoothing in smoothings:
+        for index, (level, prune) in enumerate(levels):
+            rules, covered, correct, reviews = totalsByConfig[(smoothing, index)]
+            table.append((smoothing, prune, rules / folds, covered / reviews, correct / reviews))
+
+    return table
+
+def printTable(table):
+
+    print("{:>9} {:>9} {:>9} {:>9} {:>10} {:>9} {:>9}".format("smoothing", "minCount", "minScore", "topK", "rules", "coverage", "accuracy"))
+
+    for smoothing, prune, rules, coverage, accuracy in table:
+        fields = ["-" if value is None else value for value in (prune.minCount, prune.minScore, prune.topK)]
+        print("{:>9} {:>9} {:>9} {:>9} {:>10.1f} {:>9.4f} {:>9.4f}".format(smoothing, *fields, rules, coverage, accuracy))
@@ -0,0 +1,143 @@
+"""
+Scoring system answers against the gold standard.
+
+The gold answers are read into a filename -> label map once, and the system answers are streamed past it one
+line at a time, so every answer is joined to its gold answer by filename with one lookup whatever order the two
+files are in. A system answer with no gold answer (or a second answer for the same file) is extra, and the gold
+answers left in the map at the end are missing.
+"""
+
+from sentiment import preprocess, streams
+
+class Scores:
+    """
+    Confusion matrix of the answers joined so far, plus the missing and extra answers.
+    """
+
+    def __init__(self):
+
+        self.truePositive = 0
+        self.trueNegative = 0
+        self.falsePositive = 0
+        self.falseNegative = 0
+
+        self.missing = 0
+        self.extra = 0
+
+    def add(self, actual, test):
+        """
+        Count one joined pair of labels.
+        """
+
+        if actual == test:
+            if actual == 1:
+                self.truePositive += 1
+            else:
+                self.trueNegative += 1
+        elif actual == 0:
+            self.falsePositive += 1
+        else:
+            self.falseNegative += 1
+
+    @property
+    def answered(self):
+        return self.truePositive + self.trueNegative + self.falsePositive + self.falseNegative
+
+    @property
+    def precision(self):
+        return ratio(self.truePositive, self.truePositive + self.falsePositive)
+
+    @property
+    def recall(self):
+        return ratio(self.truePositive, self.truePositive + self.falseNegative)
+
+    @property
+    def f1(self):
+        return ratio(2 * self.precision * self.recall, self.precision + self.recall)
+
+    @property
+    def accuracy(self):
+        return ratio(self.truePositive + self.trueNegative, self.answered)
+
+    def summary(self):
+        """
+        The confusion matrix and the scores, as printed and written to the scored file.
+        """
+
+        return "\n".join([
+            "Precision: {}".format(self.precision),
+            "Recall: {}".format(self.recall),
+            "F1: {}".format(self.f1),
+            "Accuracy: {}".format(self.accuracy),
+            "",
+            "{:<13} {:>10} {:>10}".format("gold \\ system", "1", "0"),
+            "{:<13} {:>10} {:>10}".format("1", self.truePositive, self.falseNegative),
+            "{:<13} {:>10} {:>10}".format("0", self.falsePositive, self.trueNegative),
+            "",
+            "Answered: {}".format(self.answered),
+            "Missing: {}".format(self.missing),
+            "Extra: {}".format(self.extra),
+        ])
+
+def ratio(numerator, denominator):
+    """
+    numerator / denominator, 0.0 when there is nothing to divide by (no positives, no answers).
+    """
+
+    return numerator / denominator if denominator else 0.0
+
+def readAnswers(filepath):
+    """
+    Yield (filename, label) for every line of an answers file.
+    """
+
+    for line in preprocess.splitData(filepath):
+        fields = line.split()
+        yield fields[0], int(fields[1])
+
+def evaluate(gold, answers, scored=None):
+    """
+    Join the system answers to the gold {filename: label} map by filename and count them. Each joined pair is written
+    to the scored file handle if one is given. The map is emptied as it is used, what is left in it is missing.
+    """
+
+    scores = Scores()
+
+    for filename, test in answers:
+        actual = gold.pop(filename, None)
+
+        if actual is None:  # Not in the gold standard, or already answered.
+            scores.extra += 1
+            if scored is not None:
+                scored.write("{} | {} {} | extra\n".format(filename, filename, test))
+            continue
+
+        scores.add(actual, test)
+
+        if scored is not None:
+            scored.write("{} {} | {} {} | {}\n".format(filename, actual, filename, test, actual == test))
+
+    scores.missing = len(gold)
+
+    if scored is not None:
+        for filename, actual in gold.items():
+            scored.write("{} {} | {} | missing\n".format(filename, actual, filename))
+
+    return scores
+
+def evaluateFiles(goldPath, answersPath, scoredPath=None):
+    """
+    Score the answers file against the gold file, writing the joined rows and the summary to scoredPath.
+    Any of the files can be compressed or '-' for stdin or stdout, see sentiment.streams.
+    """
+
+    gold = dict(readAnswers(goldPath))
+
+    if scoredPath is None:
+        return evaluate(gold, readAnswers(answersPath))
+
+    with streams.openOutput(scoredPath) as scored:  # Flushed in 1MB writes
+        scores = evaluate(gold, readAnswers(answersPath), scored)
+        scored.write(scores.summary())
+
+    return scores
@@ -0,0 +1,129 @@
+"""
+Picking up a retrained decision list without restarting.
+
+The trainer publishes a list by renaming a complete file over the old one, stamped with a new version
+(see sentiment.listfile). ModelReloader keeps a DecisionListModel of the newest version of the file:
+check() stats the file, which costs next to nothing, and only when the file changed does it read the version stamp,
+and only when that changed does it load the new list. The new model is loaded and its rule index built before it
+is swapped in, by assigning one reference, so whoever classifies never waits for a load:
+
+    reloader = ModelReloader("sentiment-decision-list.bin")
+    reloader.start()    # Check every 5 seconds in a background thread
+    reloader.model.predict(texts)
+
+Take reloader.model once per batch, the batch then finishes on the model it started with even if a new one is
+swapped in halfway. The old model is freed once nothing uses it any more.
+
+If the new file cannot be loaded the old model stays, and the file is not tried again until it changes.
+The prediction cache (sentiment.predictioncache) is handed on to the new model, its keys include the version of the
+list, so the answers of the old list are never used and age out of the cache.
+"""
+
+import os
+import sys
+import threading
+
+from sentiment import listfile
+from sentiment.model import DecisionListModel
+
+DEFAULT_INTERVAL = 5.0  # Seconds between checks
+
+def fileSignature(filepath):
+    """
+    What os.stat() says about the file that changes when it is replaced or rewritten, None if it is not there.
+    """
+
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:   # Between two renames on some file systems, or not published yet.
+        return None
+
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+class ModelReloader:
+    """
+    The newest version of the decision list in filepath, as a DecisionListModel.
+    """
+
+    def __init__(self, filepath, keepScores=False, cache=None, interval=DEFAULT_INTERVAL):
+
+        self.filepath = filepath
+        self.keepScores = keepScores
+        self.cache = cache
+        self.interval = interval
+        self.reloads = 0
+
+        self.signature = fileSignature(filepath)
+        self.model = self.load()
+
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def load(self):
+        """
+        Load the list, ready to classify.
+        """
+
+        model = DecisionListModel.load(self.filepath, self.keepScores, self.cache)
+        model.classifier()  # Build the rule index now, not in the first batch after the swap.
+
+        return model
+
+    def check(self):
+        """
+        Load the list again if a new version was published, and swap it in. Returns whether it did.
+        Raises whatever loading the new file raised, the old model stays.
+        """
+
+        signature = fileSignature(self.filepath)
+
+        if signature is None or signature == self.signature:
+            return False
+
+        self.signature = signature  # A file that fails to load is not tried again until it changes.
+
+        stamp = listfile.readHeader(self.filepath)[3]
+
+        if stamp is not None and stamp == self.model.stamp:    # Touched or copied, but the same list.
+            return False
+
+        self.model = self.load()    # Swapped in one assignment, whoever took the old model finishes with it.
+        self.reloads += 1
+
+        return True
+
+    def poll(self):
+        """
+        check(), but report what happened on stderr instead of raising.
+        """
+
+        try:
+            if self.check():
+                print("Loaded version {} of {}".format(self.model.stamp, self.filepath), file=sys.stderr)
+                return True
+        except Exception as error:  # Keep classifying with the old list, whatever went wrong with the new one.
+            print("Could not load {}, keeping version {}: {}".format(self.filepath, self.model.stamp, error), file=sys.stderr)
+
+        return False
+
+    def run(self):
+
+        while not self.stopping.wait(self.interval):
+            self.poll()
+
+    def start(self):
+        """
+        Check for a new version every interval seconds in a background thread.
+        """
+
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.run, name="ModelReloader", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+
+        self.stopping.set()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,380 @@
+"""
+Decision list file formats.
+
+The text decision list has to be split and parsed line by line before the classifier can use it.
+The binary format is laid out so it can be memory mapped and queried in place:
+
+    header      magic, version, byte order, n-gram order, hash bits (0 for none), default class (255 for none),
+                prior class (255 for none), rule count, string table size, hash slot count, version stamp
+    offsets     uint32 * (rules + 1)   where each rule starts in the string table
+    scores      float32 * rules        the log score of each rule
+    slots       int32 * slots          open addressing hash index of rule -> rank, -1 is empty
+    classes     uint8 * rules          the class of each rule
+    strings     utf-8 rule text, one after another
+
+Rules are stored in rank order, so a rule's rank is its position in the arrays.
+The hash index points at the first rule with a given key, which is the rule the list scan would have hit first.
+
+Both formats record the features (preprocess.Features) the list was trained with, so the classifier can build the
+same ones. The text format does it with a '#features order=3 hashBits=18' header line, which is only written when
+the features are not the default unigrams and bigrams.
+
+A pruned list can end in a default class, the class of a review that no rule matches. The text format writes it
+as a '#default 1' line before the rules.
+
+Every list also records its prior class, the class with the most n-grams in the training counts, so the classifier
+still has an answer for a review no rule matches when the list has no default class. The text format writes it
+as a '#prior 1' line.
+
+Every list is stamped with the time it was written in nanoseconds (a '#version 1697651234567890123' line in the text
+format), so a long running classifier can tell a newly published list from the one it has. Lists are published by
+writing a temporary file and renaming it over the old one (streams.replacing), a classifier that opens the list
+while it is being written still gets the whole old list. A text list written before the stamp has none.
+"""
+
+import mmap
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+from sentiment import streams
+from sentiment.preprocess import Features, DEFAULT_FEATURES
+
+MAGIC = b"SDLB"
+VERSION = 5
+
+HEADER = struct.Struct("<4sHHHHBBxxIIIQ")  # magic, version, byte order, order, hash bits, default class, prior class, (padding), rule count, string bytes, slot count, stamp
+
+FEATURES_HEADER = "#features"
+DEFAULT_HEADER = "#default"
+PRIOR_HEADER = "#prior"
+STAMP_HEADER = "#version"
+
+FEATURE_SETTINGS = ("order", "hashBits")    # The settings of a '#features' line, 'order=3'
+
+NO_DEFAULT = 255
+
+BYTE_ORDERS = {"little": 0, "big": 1}
+
+EMPTY_SLOT = -1
+
+def formatFeatures(features):
+    """
+    The '#features ...' header line of a text decision list.
+    """
+
+    line = "{} order={}".format(FEATURES_HEADER, features.order)
+
+    if features.hashBits:
+        line += " hashBits={}".format(features.hashBits)
+
+    return line
+
+def parseFeatures(line):
+    """
+    Read the features from a '#features ...' header line, or None if line is not one.
+    """
+
+    fields = line.split()
+
+    if not fields or fields[0] != FEATURES_HEADER:
+        return None
+
+    settings = dict(field.split("=", 1) for field in fields[1:])
+
+    return Features(order=int(settings.get("order", DEFAULT_FEATURES.order)), hashBits=int(settings["hashBits"]) if "hashBits" in settings else None)
+
+def isHeader(fields):
+    """
+    Whether a split line of a text decision list is one of the header lines instead of a rule.
+    A rule has three fields with a numeric class, so the rule for a token like '#features' or '#prior' is still a rule.
+    """
+
+    if fields[0] == FEATURES_HEADER:
+        return len(fields) > 1 and all(isSetting(field) for field in fields[1:])
+
+    return fields[0] in (DEFAULT_HEADER, PRIOR_HEADER, STAMP_HEADER) and len(fields) == 2
+
+def isSetting(field):
+    """
+    Whether a field of a '#features' line is a setting, 'order=3' or 'hashBits=18'.
+    """
+
+    name, equals, value = field.partition("=")
+
+    return name in FEATURE_SETTINGS and value.isdigit()
+
+def newStamp():
+    """
+    The version stamp of a list written now.
+    """
+
+    return time.time_ns()
+
+def hashKey(key):
+    """
+    Stable hash of a rule key, the python hash() is randomized between runs so it can not be stored.
+    """
+
+    return zlib.crc32(key)
+
+def slotCountFor(ruleCount):
+    """
+    The number of hash slots for a list, a power of two that keeps the table at most half full.
+    """
+
+    slots = 1
+
+    while slots < ruleCount * 2:
+        slots *= 2
+
+    return slots
+
+def writeBinaryList(rules, filepath, features=DEFAULT_FEATURES, defaultClass=None, priorClass=None, stamp=None):
+    """
+    Write the decision list to filepath in the binary format, stamped with stamp (newStamp() if it is None).
+    rules is a list of (rule, class, score) in rank order.
+    """
+
+    offsets = array("I", [0])
+    scores = array("f")
+    classes = array("B")
+    strings = bytearray()
+
+    slotCount = slotCountFor(len(rules))
+    slots = array("i", [EMPTY_SLOT]) * slotCount
+    mask = slotCount - 1
+
+    for rank, (rule, classVal, score) in enumerate(rules):
+        strings += rule.encode("utf-8")
+        offsets.append(len(strings))
+        scores.append(float(score))
+        classes.append(int(classVal))
+
+        key = rule.encode("utf-8")
+        slot = hashKey(key) & mask
+
+        while slots[slot] != EMPTY_SLOT:    # Linear probing until we find the key or an empty slot.
+            other = slots[slot]
+            if rules[other][0] == rule:   # A higher ranked rule already owns this key.
+                break
+            slot = (slot + 1) & mask
+        else:
+            slots[slot] = rank
+
+    stamp = newStamp() if stamp is None else stamp
+
+    with streams.replacing(filepath) as temporary, open(temporary, "wb") as f:  # Renamed over the old list once it is all written
+        f.write(HEADER.pack(MAGIC, VERSION, BYTE_ORDERS[sys.byteorder], features.order, features.hashBits or 0, NO_DEFAULT if defaultClass is None else defaultClass, NO_DEFAULT if priorClass is None else priorClass, len(rules), len(strings), slotCount, stamp))
+        f.write(offsets.tobytes())
+        f.write(scores.tobytes())
+        f.write(slots.tobytes())
+        f.write(classes.tobytes())
+        f.write(strings)
+
+def isBinaryList(filepath):
+    """
+    Check the magic bytes to see if filepath is a binary decision list.
+    """
+
+    with open(filepath, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+class BinaryDecisionList:
+    """
+    A memory mapped binary decision list.
+
+    Indexing it gives [rule, class] rows like the ones openList() builds from the text file,
+    and get() looks a rule up in the hash index without building the whole list.
+    """
+
+    def __init__(self, filepath):
+
+        self.filepath = filepath
+
+        with open(filepath, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, byteOrder, order, hashBits, defaultClass, priorClass, self.ruleCount, stringBytes, self.slotCount, self.stamp = HEADER.unpack_from(self.buffer, 0)
+
+        if magic != MAGIC:
+            raise ValueError("{} is not a binary decision list".format(filepath))
+        if version != VERSION:
+            raise ValueError("{} is version {}, expected version {}".format(filepath, version, VERSION))
+        if byteOrder != BYTE_ORDERS[sys.byteorder]:
+            raise ValueError("{} was written on a machine with a different byte order".format(filepath))
+
+        view = memoryview(self.buffer)
+        position = HEADER.size
+
+        self.offsets = view[position : position + 4 * (self.ruleCount + 1)].cast("I")
+        position += 4 * (self.ruleCount + 1)
+
+        self.scores = view[position : position + 4 * self.ruleCount].cast("f")
+        position += 4 * self.ruleCount
+
+        self.slots = view[position : position + 4 * self.slotCount].cast("i")
+        position += 4 * self.slotCount
+
+        self.classes = view[position : position + self.ruleCount]
+        position += self.ruleCount
+
+        self.strings = view[position : position + stringBytes]
+        self.mask = self.slotCount - 1
+
+        self.features = Features(order=order, hashBits=hashBits or None)
+        self.defaultClass = None if defaultClass == NO_DEFAULT else defaultClass
+        self.priorClass = None if priorClass == NO_DEFAULT else priorClass
+
+    def __len__(self):
+        return self.ruleCount
+
+    def __getitem__(self, rank):
+        return [self.rule(rank), str(self.classes[rank])]
+
+    def rule(self, rank):
+        """
+        The rule at rank.
+        """
+
+        return str(self.strings[self.offsets[rank] : self.offsets[rank + 1]], "utf-8")
+
+    def ruleClass(self, rank):
+        return self.classes[rank]
+
+    def score(self, rank):
+        return self.scores[rank]
+
+    def get(self, key, default=None):
+        """
+        Return the rank of the first rule matching key, or default if no rule matches.
+        """
+
+        encoded = key.encode("utf-8")
+        slot = hashKey(encoded) & self.mask
+
+        while True:
+            rank = self.slots[slot]
+            if rank == EMPTY_SLOT:
+                return default
+            if self.strings[self.offsets[rank] : self.offsets[rank + 1]] == encoded:
+                return rank
+            slot = (slot + 1) & self.mask
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __reduce__(self):
+        return BinaryDecisionList, (self.filepath,) # A worker process maps the file again instead of copying it.
+
+    def close(self):
+        """
+        Release the views and unmap the file.
+        """
+
+        for view in (self.offsets, self.scores, self.slots, self.classes, self.strings):
+            view.release()
+        self.buffer.close()
+
+def readHeader(filepath):
+    """
+    The features a text or binary decision list was trained with, its default class, its prior class and its version
+    stamp (None if it has none), as (features, defaultClass, priorClass, stamp).
+    """
+
+    if isBinaryList(filepath):
+        with open(filepath, "rb") as f:
+            fields = HEADER.unpack_from(f.read(HEADER.size))
+        if fields[1] != VERSION:
+            raise ValueError("{} is version {}, expected version {}".format(filepath, fields[1], VERSION))
+        order, hashBits, defaultClass, priorClass = fields[3:7]
+        return Features(order=order, hashBits=hashBits or None), None if defaultClass == NO_DEFAULT else defaultClass, None if priorClass == NO_DEFAULT else priorClass, fields[-1]
+
+    features = DEFAULT_FEATURES
+    defaultClass = None
+    priorClass = None
+    stamp = None
+
+    with streams.openInput(filepath) as f:
+        for line in f:  # The header lines come before the first rule.
+            fields = line.split()
+            if not fields or not isHeader(fields):
+                break
+            if fields[0] == FEATURES_HEADER:
+                features = parseFeatures(line)
+            elif fields[0] == PRIOR_HEADER:
+                priorClass = int(fields[1])
+            elif fields[0] == STAMP_HEADER:
+                stamp = int(fields[1])
+            else:
+                defaultClass = int(fields[1])
+
+    return features, defaultClass, priorClass, stamp
+
+def readFeatures(filepath):
+    """
+    The features a text or binary decision list was trained with.
+    """
+
+    return readHeader(filepath)[0]
+
+def readTextList(filepath):
+    """
+    Read a text decision list into (rule, class, score) rows, in rank order.
+    """
+
+    rules = []
+
+    with streams.openInput(filepath) as file:
+        for line in file:
+            line = line.split()
+            if line and not isHeader(line):
+                rules.append((line[0], int(line[1]), float(line[2])))
+
+    return rules
+
+def writeTextList(rules, filepath, features=DEFAULT_FEATURES, defaultClass=None, priorClass=None, stamp=None):
+    """
+    Write (rule, class, score) rows in the text format the trainer has always used, stamped with stamp (newStamp()
+    if it is None). filepath can be '-' for stdout or end in a compression suffix, see sentiment.streams.
+    """
+
+    with streams.replacing(filepath) as temporary, streams.openOutput(temporary) as f:  # Renamed over the old list once it is all written
+        f.write("{} {}\n".format(STAMP_HEADER, newStamp() if stamp is None else stamp))
+        if features != DEFAULT_FEATURES:
+            f.write(formatFeatures(features) + "\n")
+        if defaultClass is not None:
+            f.write("{} {}\n".format(DEFAULT_HEADER, defaultClass))
+        if priorClass is not None:
+            f.write("{} {}\n".format(PRIOR_HEADER, priorClass))
+
+        for rule, classVal, score in rules:
+            f.write("{} {} {}\n".format(rule, classVal, score))
+
+def exportTextList(binaryPath, textPath):
+    """
+    Export a binary decision list to the text format.
+    """
+
+    decisionList = BinaryDecisionList(binaryPath)
+
+    try:
+        writeTextList(((decisionList.rule(rank), decisionList.ruleClass(rank), decisionList.score(rank)) for rank in range(len(decisionList))), textPath, decisionList.features, decisionList.defaultClass, decisionList.priorClass, decisionList.stamp)
+    finally:
+        decisionList.close()
+
+if __name__ == "__main__":
+
+    # python3 -m sentiment.listfile export sentiment-decision-list.bin sentiment-decision-list.txt
+    # python3 -m sentiment.listfile import sentiment-decision-list.txt sentiment-decision-list.bin
+
+    command, source, destination = sys.argv[1:4]
+
+    if command == "export":
+        exportTextList(source, destination)
+    elif command == "import":
+        writeBinaryList(readTextList(source), destination, *readHeader(source))
+    else:
+        sys.exit("unknown command {}, expected export or import".format(command))
@@ -0,0 +1,252 @@
+"""
+A decision list as an object in memory.
+
+The programs hand the decision list to each other through files: the trainer writes it and the test program and
+the server read it back. DecisionListModel keeps the list in memory, together with the features it was trained with
+and the classes of the reviews no rule matches, so a long running program can train it or load it once and then
+classify in-process:
+
+    model = DecisionListModel().fit(open("data/sentiment-train.txt"))
+    model.predict_one("this movie was not good .")     ->  0
+    model.predict(["a fine film .", "dull ."])          ->  [1, 0]
+    model.save("sentiment-decision-list.bin", "binary")
+    model = DecisionListModel.load("sentiment-decision-list.bin")
+
+fit() trains like decision-list-train.py (sentiment.training) and save() writes the list it would. predict()
+preprocesses every review on its own like the server, the not handling starts over at each review, and classifies
+them a batch at a time with sentiment.batch. A review no rule matches gets the fallback class, like in the test program.
+With a sentiment.predictioncache.PredictionCache, a review the model has seen recently is answered from the cache:
+
+    model = DecisionListModel.load("sentiment-decision-list.txt", cache=PredictionCache(100000))
+
+Every decision list the model fits or loads gets a new version, which is part of the cache keys, and the cache is
+cleared when the decision list is replaced.
+
+decision-list-train.py saves a model, and decision-list-test.py and decision-list-server.py load one.
+"""
+
+import itertools
+
+from sentiment import batch, counts, listfile, preprocess, pruning, training
+from sentiment.classifier import loadList, chooseFallback
+
+PREDICT_BATCH = 1024    # How many reviews predict() classifies at once.
+
+VERSIONS = itertools.count(1)   # The version of every decision list a model holds, unique in the process.
+NO_MATCH = (None, None) # The (class, rank) of a review no rule matches.
+
+def trainingLine(review):
+    """
+    A labelled review as a line of the training file: lines stay as they are, a (text, label) pair gets a filename.
+    """
+
+    if isinstance(review, str):
+        return review
+
+    text, label = review
+
+    return "- {} {}".format(label, text)    # tokenData drops the filename.
+
+class DecisionListModel:
+    """
+    A decision list with the features it was trained with, its default class and its prior class.
+    """
+
+    def __init__(self, decisionList=None, features=preprocess.DEFAULT_FEATURES, defaultClass=None, priorClass=None, cache=None, stamp=None):
+
+        self.decisionList = decisionList    # Rows of [rule, class] or [rule, class, score] in rank order, or a listfile.BinaryDecisionList
+        self.features = features
+        self.defaultClass = defaultClass    # The class of a review no rule of a pruned list matches
+        self.priorClass = priorClass    # The class with the most n-grams in the training counts
+        self.cache = cache  # A predictioncache.PredictionCache, or None
+        self.stamp = stamp  # The version stamp of the list file, None until it is saved
+        self.version = next(VERSIONS)
+        self.engine = None  # The batch.BatchClassifier of the list, built when it first classifies
+
+    @classmethod
+    def load(cls, filepath, keepScores=True, cache=None):
+        """
+        Load a text or binary decision list, see classifier.loadList(). Without keepScores a text list takes less
+        memory, but cannot be saved again.
+        """
+
+        features, defaultClass, priorClass, stamp = listfile.readHeader(filepath)
+
+        return cls(loadList(filepath, keepScores), features, defaultClass, priorClass, cache, stamp)
+
+    def fit(self, reviews, smoothing=1, prune=pruning.NO_PRUNING, resetScope=False, useNumpy=True):
+        """
+        Train the decision list on labelled reviews, each a line of the training file ('filename label tokens...')
+        or a (text, label) pair. Blank lines are skipped like the training program skips them. The settings are the
+        ones of the training program. Returns the model.
+        """
+
+        lines = (line for line in map(trainingLine, reviews) if line.strip())  # Skip blank lines, there is no review on them.
+        ngrams = counts.getNgramCounts(counts.bundleData(preprocess.ngrams(preprocess.normalize(lines, preprocess.TRAIN, resetScope=resetScope), self.features)))
+
+        lengths = {"pos": training.countLength("pos", ngrams), "neg": training.countLength("neg", ngrams)}
+        rows = training.scoreCounts(ngrams, ngrams.vocabulary(sort=True), lengths, smoothing, useNumpy)
+
+        self.setList(pruning.pruneRows(rows, ngrams, prune), prune.defaultClass, counts.priorClass(lengths))
+
+        return self
+
+    def setList(self, decisionList, defaultClass=None, priorClass=None):
+        """
+        Replace the decision list (with the same features) and its classes.
+        """
+
+        self.close()
+
+        self.decisionList = decisionList
+        self.defaultClass = defaultClass
+        self.priorClass = priorClass
+        self.stamp = None
+        self.version = next(VERSIONS)
+        self.engine = None
+
+        if self.cache is not None:
+            self.cache.clear()  # The answers of the old list
+
+    def fallbackClass(self, defaultClass=None):
+        """
+        The class of a review no rule matches and where it came from, see classifier.fallbackClass().
+        """
+
+        return chooseFallback(defaultClass, self.defaultClass, self.priorClass)
+
+    def classifier(self):
+        """
+        The batch engine of the decision list.
+        """
+
+        if self.decisionList is None:
+            raise ValueError("the model has no decision list yet, fit or load one first")
+
+        if self.engine is None:
+            self.engine = batch.BatchClassifier(self.decisionList)
+
+        return self.engine
+
+    @property
+    def coverage(self):
+        """
+        The classifier.Coverage of the reviews predicted since the decision list was fitted or loaded.
+        """
+
+        return self.classifier().coverage
+
+    def predict_one(self, review, defaultClass=None):
+        """
+        The label of one review given as text. A review no rule matches gets defaultClass if it is given, otherwise
+        the fallback class of the list, None if the list has none.
+        """
+
+        return self.predictBatch([review], defaultClass)[0]
+
+    def predict(self, reviews, defaultClass=None):
+        """
+        The labels of the reviews given as text, as a list in the same order. See predict_one().
+        """
+
+        labels = []
+
+        for texts in batch.batches(reviews, PREDICT_BATCH):
+            labels.extend(self.predictBatch(texts, defaultClass))
+
+        return labels
+
+    def predictBatch(self, texts, defaultClass=None):
+        """
+        The labels of a list of reviews given as text, classified as one batch, the cached ones from the cache.
+        """
+
+        fallback = self.fallbackClass(defaultClass)[0]
+
+        if self.cache is None:
+            matches = self.match(texts)
+        else:
+            matches = self.cachedMatch(texts)
+
+        return [fallback if rank is None else label for label, rank in matches]
+
+    def cachedMatch(self, texts):
+        """
+        match(), but the reviews in the cache are not classified again, and neither are the copies of a review in
+        the batch. A copy counts as a hit.
+        """
+
+        keys = [self.cache.key(self.version, text) for text in texts]
+        known = {}  # key -> (class, rank) of the reviews in the batch
+        pending = {}    # key -> text of the reviews to classify
+
+        for key, text in zip(keys, texts):
+            if key in known or key in pending:
+                self.cache.hits += 1
+                continue
+
+            match = self.cache.get(key)
+
+            if match is None:
+                pending[key] = text
+            else:
+                known[key] = match
+
+        for key, match in zip(pending, self.match(list(pending.values()))):
+            known[key] = match
+            self.cache.put(key, match)
+
+        matches = [known[key] for key in keys]
+
+        coverage = self.coverage    # The engine counted the reviews it classified, the others still count.
+        coverage.reviews += len(texts) - len(pending)
+        coverage.unmatched += matches.count(NO_MATCH) - sum(1 for key in pending if known[key] == NO_MATCH)
+
+        return matches
+
+    def match(self, texts):
+        """
+        The (class, rank) of the first rule in each review given as text, NO_MATCH where no rule matches.
+        """
+
+        engine = self.classifier()
+        ranks = engine.matchBatch([preprocess.processReview(text, self.features) for text in texts])
+
+        return [NO_MATCH if rank is None else (int(engine.classes[rank]), rank) for rank in ranks]
+
+    def rows(self):
+        """
+        The decision list as (rule, class, score) rows, for writing.
+        """
+
+        if isinstance(self.decisionList, listfile.BinaryDecisionList):
+            return [(self.decisionList.rule(rank), self.decisionList.ruleClass(rank), self.decisionList.score(rank)) for rank in range(len(self.decisionList))]
+
+        if self.decisionList and len(self.decisionList[0]) < 3:
+            raise ValueError("the decision list was loaded without its scores, load it with keepScores to save it")
+
+        return self.decisionList
+
+    def save(self, filepath, fileFormat="text"):
+        """
+        Write the decision list to filepath as text or binary, with its features, default class, prior class and
+        version stamp. A new list is stamped when it is first saved. The file is replaced in one rename, a program
+        that reads it meanwhile still gets the old list.
+        """
+
+        if self.decisionList is None:
+            raise ValueError("the model has no decision list yet, fit or load one first")
+
+        if self.stamp is None:
+            self.stamp = listfile.newStamp()
+
+        training.writeSortedList(self.rows(), filepath, fileFormat, self.features, self.defaultClass, self.priorClass, self.stamp)
+
+    def close(self):
+        """
+        Unmap a binary decision list.
+        """
+
+        if isinstance(self.decisionList, listfile.BinaryDecisionList):
+            self.engine = None
+            self.decisionList.close()
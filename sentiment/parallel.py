@@ -0,0 +1,172 @@
+"""
+Classifying one test file in worker processes.
+
+The file is split into byte ranges on line boundaries (preprocess.shardOffsets), a few per worker so a slow chunk
+does not hold the others up. Every worker preprocesses and classifies its chunks and writes the answers (and the
+explanations) of each chunk to a part file of its own. The parent appends the part files to the output in the
+order of the chunks, so the answers come out in the order of the reviews, as if the file had been classified serially.
+
+The decision list and its rule index (or automaton) are built once in the parent and the workers are forked from
+it, so they share its memory copy-on-write instead of loading the list again. A binary list is memory mapped, the
+workers share its pages even where processes are not forked (it is pickled as its filename and mapped again).
+
+The not handling flag carries over from one review to the next, so like counts.countShard every chunk classifies
+its leading reviews both ways (starting inside and outside of a 'not', see preprocess.notHandlingShard) until the
+two agree, and keeps those answers in memory. The parent picks the right ones once it knows how the chunk before ended.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from sentiment import preprocess, streams
+from sentiment.classifier import buildRuleIndex, matchReview, explainReview, ruleClasses, explanation, Coverage, EXPLAIN_HEADER
+
+CHUNKS_PER_WORKER = 4
+OUTPUT_BUFFER = 1 << 20 # The answers are written in 1MB blocks.
+
+state = None    # (filepath, decide, explaining, resetScope, features, directory) of the run, in every worker.
+
+def startMethod():
+    """
+    Fork where the platform can, the workers then start with the decision list already in memory.
+    """
+
+    return "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+
+def initWorker(runState):
+    """
+    Build the decide(review) function of the worker, from the matcher it was given.
+    """
+
+    global state
+
+    filepath, decisionList, matcher, classes, defaultClass, explaining, resetScope, features, directory = runState
+
+    if hasattr(matcher, "match"):   # A sentiment.automaton.RuleAutomaton
+        match, explain = matcher.match, matcher.explain
+    else:
+        match = lambda review: matchReview(matcher, review)
+        explain = lambda review: explainReview(matcher, classes, review)
+
+    def decide(review):
+        """
+        (unmatched, lines) for a review: whether no rule matched it, and its answer line and explanation line
+        (None unless explaining), lines is None if it gets no label.
+        """
+
+        rank, opposingRank = explain(review) if explaining else (match(review), None)
+        label = classes[rank] if rank is not None else defaultClass
+
+        if label is None:
+            return rank is None, None
+
+        return rank is None, ("{} {}\n".format(review[0], label), explanation(decisionList, review, label, rank, opposingRank) if explaining else None)
+
+    state = (filepath, decide, explaining, resetScope, features, directory)
+
+def classifyChunk(task):
+    """
+    Classify the reviews in one byte range of the test file.
+
+    Returns (prefixes, flags, coverage, answersPath, explainPath):
+    prefixes[startFlag] are the (unmatched, lines) of the leading reviews that depend on the flag the chunk starts
+    with, flags[startFlag] is the not handling flag at the end of the chunk, and the lines of the rest of the chunk
+    are in the part files answersPath and explainPath (None unless explaining), with their Coverage.
+    """
+
+    index, start, end = task
+    filepath, decide, explaining, resetScope, features, directory = state
+
+    answersPath = os.path.join(directory, "{}.answers".format(index))
+    explainPath = os.path.join(directory, "{}.explain".format(index)) if explaining else None
+
+    prefixes = {False: [], True: []}
+    flags = {}
+    coverage = Coverage()
+
+    reviews = preprocess.tokenData(preprocess.splitShard(filepath, start, end), preprocess.TEST)
+
+    with open(answersPath, "w", buffering=OUTPUT_BUFFER) as answers, open(explainPath or os.devnull, "w", buffering=OUTPUT_BUFFER) as explained:
+
+        for startFlag, review in preprocess.notHandlingShard(reviews, flags, resetScope):
+            decision = decide(preprocess.featureReview(review, features))
+
+            if startFlag is not None:   # Kept until the parent knows how the chunk before ended.
+                prefixes[startFlag].append(decision)
+                continue
+
+            unmatched, lines = decision
+            coverage.reviews += 1
+            coverage.unmatched += unmatched
+
+            if lines is not None:
+                answers.write(lines[0])
+                if explaining:
+                    explained.write(lines[1])
+
+    return prefixes, flags, coverage, answersPath, explainPath
+
+def appendPart(partPath, output):
+    """
+    Copy a part file to the end of the output and delete it.
+    """
+
+    with open(partPath) as part:
+        shutil.copyfileobj(part, output, OUTPUT_BUFFER)
+
+    os.remove(partPath)
+
+def classifyFile(decisionList, filepath, workers, answersPath, explainPath=None, defaultClass=None, resetScope=False, features=preprocess.DEFAULT_FEATURES, ruleAutomaton=None):
+    """
+    Classify the test file in filepath using workers processes, writing the answers to answersPath (and the
+    explanations to explainPath) in the order of the reviews. Returns the Coverage of the reviews.
+    filepath has to be an uncompressed file, the outputs can be '-' or compressed (see sentiment.streams).
+    With a ruleAutomaton (a sentiment.automaton.RuleAutomaton) the reviews get no n-grams and the automaton finds the rules.
+    """
+
+    if ruleAutomaton is not None:
+        matcher = ruleAutomaton
+        features = features._replace(order=1)  # Only the words, the automaton finds the n-grams itself
+    else:
+        matcher = buildRuleIndex(decisionList)
+
+    classes = ruleClasses(decisionList)
+    chunks = preprocess.shardOffsets(filepath, workers * CHUNKS_PER_WORKER)
+    explaining = explainPath is not None
+
+    # The part files go next to the answers, where there is room for the answers anyway.
+    with tempfile.TemporaryDirectory(prefix=".sentiment-parts-", dir=os.path.dirname(os.path.abspath(answersPath))) as directory:
+
+        runState = (filepath, decisionList, matcher, classes, defaultClass, explaining, resetScope, features, directory)
+        tasks = [(index, start, end) for index, (start, end) in enumerate(chunks)]
+
+        with multiprocessing.get_context(startMethod()).Pool(workers, initializer=initWorker, initargs=(runState,)) as pool, \
+                streams.openOutput(answersPath) as answers, streams.openOutput(explainPath or os.devnull) as explained:
+
+            if explaining:
+                explained.write(EXPLAIN_HEADER)
+
+            notHandlingFlag = False  # The serial path starts outside of a 'not' too.
+            coverage = Coverage()
+
+            for prefixes, flags, chunkCoverage, chunkAnswers, chunkExplained in pool.imap(classifyChunk, tasks):  # In chunk order, as they finish
+                for unmatched, lines in prefixes[notHandlingFlag]:  # Keep the prefix that matches how the previous chunk ended.
+                    coverage.reviews += 1
+                    coverage.unmatched += unmatched
+
+                    if lines is not None:
+                        answers.write(lines[0])
+                        if explaining:
+                            explained.write(lines[1])
+
+                coverage.add(chunkCoverage)
+
+                appendPart(chunkAnswers, answers)
+                if explaining:
+                    appendPart(chunkExplained, explained)
+
+                notHandlingFlag = flags[notHandlingFlag]
+
+    return coverage
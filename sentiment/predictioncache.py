@@ -0,0 +1,82 @@
+"""
+In-memory LRU cache of predictions.
+
+The same review text often comes in again, reposted or syndicated, sometimes with different spacing. Classifying
+it again means tokenizing it, doing the not handling, adding the n-grams and looking them all up again, only to get
+the same answer. The cache keeps the answer for the reviews seen most recently.
+
+A review is keyed by the blake2b hash of its tokens (the whitespace it was split on does not matter) and the version
+of the decision list that classified it, so the keys stay small however long the review is, and an answer from an
+older decision list is never used. The value is (class, rank) of the rule that decided the review, (None, None) if
+no rule matched it, the fallback class is applied after the lookup.
+
+The reviews are preprocessed one at a time (preprocess.processReview), without a 'not' carried over from the review
+before, so the same tokens always get the same answer.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 100000
+
+class PredictionCache:
+    """
+    The answers of the last maxEntries reviews, with hit and miss counters.
+    """
+
+    def __init__(self, maxEntries=DEFAULT_MAX_ENTRIES):
+
+        self.maxEntries = maxEntries
+        self.entries = OrderedDict()    # key -> (class, rank), least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, version, text):
+        """
+        The key of a review given as text, classified by the decision list with this version.
+        """
+
+        return hashlib.blake2b("{}\n{}".format(version, " ".join(text.split())).encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key):
+        """
+        The (class, rank) cached for key, None if it is not cached.
+        """
+
+        value = self.entries.get(key)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)   # Used now, it is evicted last.
+
+        return value
+
+    def put(self, key, value):
+
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)    # The least recently used entry
+
+    def clear(self):
+        """
+        Drop every entry, when a new decision list is loaded. The counters keep counting.
+        """
+
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def summary(self):
+        """
+        The line reporting how well the cache did.
+        """
+
+        lookups = self.hits + self.misses
+
+        return "Prediction cache: {} hits, {} misses ({:.4f} hit rate), {} of {} entries used".format(self.hits, self.misses, self.hits / lookups if lookups else 0.0, len(self.entries), self.maxEntries)
@@ -0,0 +1,258 @@
+"""
+Streaming preprocessing shared by the trainer and the classifier.
+
+Every step is a generator, so the corpus is read line by line and only one review is held in memory at a time:
+
+    splitData -> tokenData -> notHandling -> ngrams
+
+The training file is "filename label tokens..." and the test file is "filename __ tokens...".
+tokenData drops the field we do not need (the filename for training, the '__' for testing),
+so a training review starts with its label and a test review starts with its filename.
+
+The trainer and the classifier build their features the same way, with the same Features settings:
+the unigrams plus the n-grams up to Features.order, each n-gram keyed as its words joined by '--'.
+With Features.hashBits set every feature is hashed into one of 2^hashBits ids, written '#<id>',
+so the count tables and the decision list stay bounded however high the order is.
+"""
+
+import zlib
+from collections import namedtuple
+
+from sentiment import streams
+
+TRAIN = "train"
+TEST = "test"
+
+DROP_FIELD = {TRAIN: 0, TEST: 1}    # Which field tokenData removes from a line.
+NGRAM_JOIN = "--"   # How the words of an n-gram are joined, by the trainer and the classifier alike.
+
+Features = namedtuple("Features", ["order", "hashBits"])
+DEFAULT_FEATURES = Features(order=2, hashBits=None)   # Unigrams and bigrams, no hashing.
+
+# The not handling used to re.match every token against r"""[()-,?\/:'"|]""" and r'[.!?]', which only look at the
+# first character. These are the characters they match (')-,' is a range, so it takes in '*' and '+' too).
+SPECIAL_CHARS = frozenset("()*+,/:?'\"|")
+END_SENTENCE_CHARS = frozenset(".!?")
+
+def splitData(filepath):
+    """
+    Split data with seperate the reviews into their own lists, one line at a time.
+    filepath can be compressed, or '-' for stdin, see sentiment.streams.
+    """
+
+    with streams.openInput(filepath) as file:    # Open the reviews text file.
+        for line in file:
+            line = line.rstrip("\n")
+            if line.strip():    # Skip blank lines, there is no review on them.
+                yield line
+
+def shardOffsets(filepath, count):
+    """
+    Split filepath into count byte ranges [(start, end), ...] that begin and end on line boundaries.
+    """
+
+    with open(filepath, "rb") as file:
+        file.seek(0, 2)
+        size = file.tell()
+
+        boundaries = [0]
+
+        for i in range(1, count):
+            offset = size * i // count
+
+            file.seek(max(offset - 1, boundaries[-1]))  # Start from the byte before so a line starting exactly at offset is kept whole.
+            file.readline() # Move to the start of the next line.
+            boundaries.append(max(file.tell(), boundaries[-1]))
+
+        boundaries.append(size)
+
+    return [(boundaries[i], boundaries[i + 1]) for i in range(count)]
+
+def splitShard(filepath, start, end):
+    """
+    splitData for the byte range [start, end) of filepath, as given by shardOffsets.
+    """
+
+    with open(filepath, "rb") as file:
+        file.seek(start)
+
+        while file.tell() < end:
+            line = file.readline()
+            if not line:
+                break
+
+            line = line.decode("utf-8").rstrip("\r\n")
+            if line.strip():    # Skip blank lines, there is no review on them.
+                yield line
+
+def tokenData(data, mode=TRAIN):
+    """
+    tokenData will tokenize each review into unigrams
+    """
+
+    dropField = DROP_FIELD[mode]
+
+    for review in data: # For each review, tokenize the review into unigrams.
+        r = review.split()
+        del r[dropField]    # Remove the filename (train) or the '__' (test), we do not need it.
+
+        yield r
+
+def notHandlingReview(review, notHandlingFlag=False):
+    """
+    Apply the not handling to a single review in place.
+    notHandlingFlag is whether we are still inside a 'not' from the previous review, the flag at the end of the review is returned.
+    The first token (the label or the filename) is left alone, a 'not' carried over only reaches the review's words.
+    """
+
+    for x in range(1, len(review)):
+        token = review[x]
+
+        if notHandlingFlag:
+            first = token[:1]   # Both checks only ever looked at the first character of the token.
+
+            if first in END_SENTENCE_CHARS:   # Stop appending 'not_' to words at the end of the sentence.
+                notHandlingFlag = False
+            elif first not in SPECIAL_CHARS:    # Append 'not_' to a word, but not to a special char.
+                token = "not_" + token
+                review[x] = token
+
+        if token == "not":  # If the current word is "not", turn the Flag to True, so we can append 'not_' to the rest of the words.
+            notHandlingFlag = True
+
+    return notHandlingFlag
+
+def notHandling(data, notHandlingFlag=False, resetScope=False):
+    """
+    notHandling will append 'not_' to words after not appears in the text
+    The flag carries over from one review to the next, unless resetScope is set.
+    """
+
+    for review in data:
+        notHandlingFlag = notHandlingReview(review, notHandlingFlag and not resetScope)
+
+        yield review
+
+def notHandlingShard(data, flags, resetScope=False):
+    """
+    notHandling for the reviews of one shard of a file, when the flag the shard starts with is not known yet.
+    The leading reviews are yielded twice, as (startFlag, review) not handled as if the shard started outside
+    (False) and inside (True) of a 'not', until the two agree. The rest of the shard is the same either way and is
+    yielded once as (None, review). flags (a dict) is filled in with the flag at the end of the shard for each startFlag.
+    """
+
+    flags[False] = False
+    flags[True] = not resetScope    # With resetScope every review starts outside of a 'not', so the start flag never matters.
+
+    for review in data:
+
+        if flags[False] == flags[True]: # Both starting flags ended up in the same place.
+            flags[False] = flags[True] = notHandlingReview(review, flags[False] and not resetScope)
+            yield None, review
+            continue
+
+        for startFlag in (False, True):
+            copy = list(review)
+            flags[startFlag] = notHandlingReview(copy, flags[startFlag])
+            yield startFlag, copy
+
+def normalize(data, mode=TRAIN, notHandlingFlag=False, resetScope=False):
+    """
+    tokenData and notHandling in one step, each line is split and not handled before the next line is read.
+    """
+
+    dropField = DROP_FIELD[mode]
+
+    for line in data:
+        review = line.split()
+        del review[dropField]   # Remove the filename (train) or the '__' (test), we do not need it.
+
+        notHandlingFlag = notHandlingReview(review, notHandlingFlag and not resetScope)
+
+        yield review
+
+def ngramKey(words):
+    """
+    The canonical key of an n-gram.
+    """
+
+    return NGRAM_JOIN.join(words)
+
+def ngramReview(review, order=2):
+    """
+    Add the 2-grams up to order-grams of a single review to the end of it, the review's own tokens are the unigrams.
+    The first token (the label or the filename) is not part of any n-gram.
+    """
+
+    newTokens = []
+
+    for n in range(2, order + 1):
+        for i in range(1, len(review) - n + 1):   # Slide across the data to gather the ngram model.
+            # If bigram: ["The--red", "red--fox", "fox--jumped", "jumped--."]
+
+            newTokens.append(NGRAM_JOIN.join(review[i : i + n]))   # Generate the n-grams of the review text
+
+    review.extend(newTokens)    # Add the new n-grams to the original review for easy computation
+
+    return review
+
+def hashFeature(feature, hashBits):
+    """
+    The hashed id of a feature, written '#<id>'. crc32 is used because python's hash() changes between runs.
+    """
+
+    return "#{}".format(zlib.crc32(feature.encode("utf-8")) & ((1 << hashBits) - 1))
+
+def featureReview(review, features=DEFAULT_FEATURES):
+    """
+    Turn a not handled review into its features in place: the tokens plus the n-grams, hashed if features.hashBits is set.
+    """
+
+    ngramReview(review, features.order)
+
+    if features.hashBits:
+        review[1:] = [hashFeature(feature, features.hashBits) for feature in review[1:]] # Keep the label or filename as it is.
+
+    return review
+
+def ngrams(reviewsList, features=DEFAULT_FEATURES):
+    """
+    ngrams will create the features (unigrams and n-grams) of the reviews.
+    """
+
+    for review in reviewsList:
+        yield featureReview(review, features)
+
+def processReview(text, features=DEFAULT_FEATURES):
+    """
+    Preprocess a single review given as plain text, the way the classifier preprocesses a line of the test file.
+    The review gets an empty slot where the filename would be, and the not handling starts fresh instead of carrying over.
+    """
+
+    review = [""] + text.split()    # "" stands in for the filename, so the n-grams start at the same place as tokenData's output.
+
+    notHandlingReview(review)   # Do the not handling.
+
+    return featureReview(review, features)
+
+def preProcessFlags(filepath, mode=TRAIN, resetScope=False, features=DEFAULT_FEATURES, notHandlingFlag=False):
+    """
+    preProcess, but yields (review, notHandlingFlag after the review), so the flag at the end of the file is known.
+    notHandlingFlag is the flag at the end of whatever came before the file.
+    """
+
+    for review in tokenData(splitData(filepath), mode):
+        notHandlingFlag = notHandlingReview(review, notHandlingFlag and not resetScope)
+
+        yield featureReview(review, features), notHandlingFlag
+
+def preProcess(filepath, mode=TRAIN, resetScope=False, features=DEFAULT_FEATURES):
+    """
+    preProcess will lazily process the reviews in filepath, yielding one processed review at a time.
+    With resetScope a 'not' at the end of one review does not carry over into the next one.
+    """
+
+    split = splitData(filepath) # Split into their own reviews
+    notHandlingData = normalize(split, mode, resetScope=resetScope)   # Tokenize the reviews so we have unigrams and do the not handling.
+
+    return ngrams(notHandlingData, features)
@@ -0,0 +1,214 @@
+"""
+Instrumentation for the train, test and eval programs.
+
+Profiling is off unless the program is run with --profile [FILE] or the SENTIMENT_PROFILE environment variable is
+set to a file name ('-' for stderr). When it is on, every stage records its calls, wall time, the time spent in
+the stages nested inside it, the items it processed and, through tracemalloc, the memory it allocated, and a JSON
+summary is written when the program ends:
+
+    {"program": "train", "seconds": 2.41, "stages": {"getNgramCounts": {"calls": 1, "seconds": 1.93,
+     "self_seconds": 0.61, "items": 1600, "allocated_mb": 11.2, "peak_mb": 14.0}, ...}, "counters": {...}}
+
+self_seconds leaves out the nested stages, preProcess streams its reviews into the stage that reads them, so its
+time is counted once as its own stage and not again in the reader's self_seconds.
+Setting SENTIMENT_PROFILE_MEMORY=0 turns tracemalloc off, it slows Python down. --cprofile FILE (or
+SENTIMENT_CPROFILE) also writes a cProfile dump of the whole run for pstats or snakeviz.
+
+When profiling is off, the hooks only check PROFILER.enabled and get out of the way.
+Stages in worker processes (--workers) are not recorded, only the stage that waits for them.
+"""
+
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+MB = 1024 * 1024
+
+class Profiler:
+    """
+    Stage timings and counters of one run.
+    """
+
+    def __init__(self):
+
+        self.enabled = False
+        self.memory = False
+        self.stages = {}
+        self.counters = {}
+        self.stack = [] # [name, start, nested seconds, traced memory at the start] of the stages that are running
+
+    def record(self, name):
+        return self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "self_seconds": 0.0, "items": 0, "allocated_mb": 0.0, "peak_mb": None})
+
+    def enter(self, name):
+
+        if self.memory and not self.stack:
+            tracemalloc.reset_peak()    # Peaks are per outermost stage, a nested reset would lose the outer one.
+
+        self.stack.append([name, time.perf_counter(), 0.0, tracemalloc.get_traced_memory()[0] if self.memory else 0])
+
+    def exit(self, items=0):
+
+        name, start, nested, allocatedBefore = self.stack.pop()
+        seconds = time.perf_counter() - start
+
+        stage = self.record(name)
+        stage["calls"] += 1
+        stage["seconds"] += seconds
+        stage["self_seconds"] += seconds - nested
+        stage["items"] += items
+
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            stage["allocated_mb"] += (current - allocatedBefore) / MB
+            if not self.stack:  # Stages that only ever run nested keep a null peak.
+                stage["peak_mb"] = max(stage["peak_mb"] or 0.0, peak / MB)
+
+        if self.stack:
+            self.stack[-1][2] += seconds    # Not part of the enclosing stage's own time.
+
+    def summary(self, program, seconds):
+
+        stages = {name: {key: round(value, 6) if isinstance(value, float) else value for key, value in stage.items()} for name, stage in self.stages.items()}
+
+        return {"program": program, "seconds": round(seconds, 6), "stages": stages, "counters": dict(self.counters)}
+
+PROFILER = Profiler()
+
+@contextlib.contextmanager
+def stage(name):
+    """
+    Time the code in the with block as the stage name.
+    """
+
+    if not PROFILER.enabled:
+        yield
+        return
+
+    PROFILER.enter(name)
+    try:
+        yield
+    finally:
+        PROFILER.exit()
+
+def timed(name):
+    """
+    Decorator, every call of the function is the stage name.
+    """
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+
+            PROFILER.enter(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                PROFILER.exit()
+
+        return wrapper
+
+    return decorator
+
+def iterate(name, iterable):
+    """
+    Yield from iterable, timing the work done to produce each item as the stage name and counting the items.
+    """
+
+    if not PROFILER.enabled:
+        return iterable
+
+    return profiledIterator(name, iter(iterable))
+
+def profiledIterator(name, iterator):
+
+    while True:
+        PROFILER.enter(name)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            PROFILER.exit()
+            return
+        except BaseException:
+            PROFILER.exit()
+            raise
+
+        PROFILER.exit(items=1)
+        yield item
+
+def items(name, count):
+    """
+    Add count items to the stage name, for stages that know their size only at the end.
+    """
+
+    if PROFILER.enabled:
+        PROFILER.record(name)["items"] += count
+
+def counter(name, value=1):
+    """
+    Add value to the counter name.
+    """
+
+    if PROFILER.enabled:
+        PROFILER.counters[name] = PROFILER.counters.get(name, 0) + value
+
+def writeSummary(summary, path):
+
+    text = json.dumps(summary, indent=4)
+
+    if path == "-":
+        print(text, file=sys.stderr)
+    else:
+        with open(path, "w") as f:
+            f.write(text + "\n")
+
+@contextlib.contextmanager
+def session(program, profilePath=None, cprofilePath=None):
+    """
+    Profile the with block if profilePath (or SENTIMENT_PROFILE) is set, and write the JSON summary when it ends.
+    With cprofilePath (or SENTIMENT_CPROFILE) the block also runs under cProfile and the stats are dumped there.
+    """
+
+    profilePath = profilePath or os.environ.get("SENTIMENT_PROFILE") or None
+    cprofilePath = cprofilePath or os.environ.get("SENTIMENT_CPROFILE") or None
+
+    if profilePath is None and cprofilePath is None:
+        yield
+        return
+
+    profiler = None
+
+    if profilePath is not None:
+        PROFILER.enabled = True
+        PROFILER.memory = os.environ.get("SENTIMENT_PROFILE_MEMORY", "1") != "0"
+        if PROFILER.memory:
+            tracemalloc.start()
+
+    if cprofilePath is not None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(cprofilePath)
+
+        if profilePath is not None:
+            PROFILER.enabled = False
+            if PROFILER.memory:
+                tracemalloc.stop()
+            writeSummary(PROFILER.summary(program, seconds), profilePath)
@@ -0,0 +1,121 @@
+"""
+Pruning the decision list.
+
+Most of the decision list is made of words seen once or twice, with scores close to zero, which almost never
+decide a review. A pruned list keeps only the rules that pass every threshold:
+
+    minCount    the word was seen at least this many times (positive and negative together)
+    minScore    the absolute log ratio is at least this
+    topK        at most this many rules, from the top
+
+and can end in a default class for the reviews none of the kept rules match.
+
+pruneReport() shows what each level of pruning costs, by classifying labelled reviews with each pruned list.
+"""
+
+from collections import namedtuple
+
+from sentiment import classifier
+
+Pruning = namedtuple("Pruning", ["minCount", "minScore", "topK", "defaultClass"])
+NO_PRUNING = Pruning(minCount=None, minScore=None, topK=None, defaultClass=None)
+
+REPORT_MIN_COUNTS = [2, 3, 5, 10, 20]
+REPORT_MIN_SCORES = [0.5, 1.0, 1.5, 2.0, 3.0]
+REPORT_TOP_KS = [100000, 50000, 20000, 10000, 5000, 1000, 500, 100]
+
+def keepRule(word, score, ngrams, pruning):
+    """
+    Whether a rule passes the count and score thresholds.
+    """
+
+    if pruning.minScore is not None and score < pruning.minScore:
+        return False
+
+    if pruning.minCount is not None and ngrams["pos"].get(word, 0) + ngrams["neg"].get(word, 0) < pruning.minCount:
+        return False
+
+    return True
+
+def pruneRows(rows, ngrams, pruning):
+    """
+    Prune a sorted decision list of (word, class, score) rows.
+    """
+
+    if pruning.minCount is not None or pruning.minScore is not None:
+        rows = [row for row in rows if keepRule(row[0], row[2], ngrams, pruning)]
+
+    if pruning.topK is not None:
+        rows = rows[:pruning.topK]
+
+    return rows
+
+def reportLevels(ruleCount):
+    """
+    The pruning levels the report compares, one threshold at a time.
+    """
+
+    levels = [("none", NO_PRUNING)]
+    levels += [("minCount {}".format(n), NO_PRUNING._replace(minCount=n)) for n in REPORT_MIN_COUNTS]
+    levels += [("minScore {}".format(x), NO_PRUNING._replace(minScore=x)) for x in REPORT_MIN_SCORES]
+    levels += [("topK {}".format(k), NO_PRUNING._replace(topK=k)) for k in REPORT_TOP_KS if k < ruleCount]
+
+    return levels
+
+def ruleHits(rows, reviews):
+    """
+    For each (label, tokens) review, its label and the ranks of every rule of the unpruned list in it, best first.
+    """
+
+    ruleIndex = classifier.buildRuleIndex([[word, classVal] for word, classVal, score in rows])
+
+    return [(label, sorted(rank for rank in map(ruleIndex.get, set(tokens)) if rank is not None)) for label, tokens in reviews]
+
+def levelCounts(rows, ngrams, hits, levels, defaultClass=None):
+    """
+    Classify the reviews in hits with the list pruned at every level, without looking the reviews up again.
+    Yields (level, rules, covered, correct), covered is the number of reviews a kept rule matched and correct counts
+    the reviews no rule matched as wrong unless there is a default class.
+    """
+
+    for level, pruning in levels:
+        kept = [keepRule(word, score, ngrams, pruning) for word, classVal, score in rows]
+
+        if pruning.topK is not None:    # Like pruneRows, the top K of the rules that passed the thresholds.
+            seen = 0
+            for rank in range(len(kept)):
+                seen += kept[rank]
+                kept[rank] = kept[rank] and seen <= pruning.topK
+
+        covered = correct = 0
+
+        for label, ranks in hits:
+            first = next((rank for rank in ranks if kept[rank]), None)  # The first rule of the pruned list in the review.
+
+            if first is not None:
+                covered += 1
+                correct += rows[first][1] == label
+            elif defaultClass is not None:
+                correct += defaultClass == label
+
+        yield level, sum(kept), covered, correct
+
+def pruneReport(rows, ngrams, reviews, defaultClass=None):
+    """
+    Classify the labelled reviews (preprocessed like training data, the label first) with the list pruned at every
+    report level. Returns [(level, rules, coverage, accuracy)], coverage is the share of reviews a rule matched.
+    """
+
+    labelled = ((0 if review[0] == '0' else 1, review[1:]) for review in reviews)    # The same test bundleData uses.
+
+    hits = ruleHits(rows, labelled)
+    total = len(hits) or 1
+
+    return [(level, rules, covered / total, correct / total) for level, rules, covered, correct in levelCounts(rows, ngrams, hits, reportLevels(len(rows)), defaultClass)]
+
+def printReport(report):
+
+    print("{:<16} {:>10} {:>10} {:>10}".format("pruning", "rules", "coverage", "accuracy"))
+
+    for level, rules, coverage, accuracy in report:
+        print("{:<16} {:>10} {:>10.4f} {:>10.4f}".format(level, rules, coverage, accuracy))
@@ -0,0 +1,159 @@
+"""
+Long running classification server.
+
+The decision list is loaded once and reviews are classified over TCP or a Unix socket with JSON lines:
+
+    {"id": 1, "review": "this movie was not good ."}        ->  {"id": 1, "label": 0}
+    {"id": 2, "reviews": ["a fine film .", "dull ."]}      ->  {"id": 2, "labels": [1, 0]}
+
+A review no rule of the decision list is in gets the default class of the server, or else the default class of a
+pruned list, or else the prior class the list records. Its label is null only for a list trained before the prior
+class was recorded.
+Requests that arrive together (from one batch request or from many connections at once) are queued and classified
+as one batch by the model (sentiment.model.DecisionListModel), which answers the reviews it has seen recently from
+its prediction cache if it has one.
+
+With a sentiment.hotreload.ModelReloader the server checks for a newly published decision list now and then. The new
+list is loaded in a worker thread while the batcher goes on with the old one, and swapped in between two batches,
+so no request waits for the load and every batch is classified by one list.
+"""
+
+import asyncio
+import json
+
+READ_LIMIT = 64 * 1024 * 1024   # Batch requests can be long lines.
+
+class ClassificationServer:
+    """
+    Holds the model and micro-batches the reviews of concurrent requests.
+    """
+
+    def __init__(self, model, maxBatch=1024, defaultClass=None, reloader=None):
+
+        self.model = model
+        self.defaultClass = defaultClass    # Overrides the fallback class of the list
+        self.maxBatch = maxBatch
+        self.reloader = reloader
+        self.queue = None
+
+    async def batcher(self):
+        """
+        Classify everything that is waiting in the queue, up to maxBatch reviews at a time.
+        """
+
+        while True:
+            items = [await self.queue.get()]
+
+            while len(items) < self.maxBatch and not self.queue.empty():  # Take whatever else queued up while we were busy.
+                items.append(self.queue.get_nowait())
+
+            labels = self.model.predictBatch([text for text, future in items], self.defaultClass)
+
+            for (text, future), label in zip(items, labels):
+                if not future.done():   # The client may have gone away.
+                    future.set_result(label)
+
+    async def watcher(self):
+        """
+        Check for a new version of the decision list every reloader.interval seconds, and swap it in once it is loaded.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            await asyncio.sleep(self.reloader.interval)
+
+            if await loop.run_in_executor(None, self.reloader.poll):    # Loaded in a thread, the batcher keeps going meanwhile.
+                self.model = self.reloader.model    # The loop runs one batch at a time, so this is between two batches.
+
+    async def classify(self, texts):
+        """
+        Queue the reviews, and wait for their labels.
+        """
+
+        loop = asyncio.get_running_loop()
+        futures = []
+
+        if not all(isinstance(text, str) for text in texts):    # Checked here, a bad review would stop the batcher.
+            raise TypeError("every review has to be a string")
+
+        for text in texts:
+            future = loop.create_future()
+            self.queue.put_nowait((text, future))
+            futures.append(future)
+
+        return await asyncio.gather(*futures)
+
+    async def respond(self, line):
+        """
+        Answer one JSON request line.
+        """
+
+        try:
+            request = json.loads(line)
+
+            if "reviews" in request:
+                if not isinstance(request["reviews"], list):    # A string would be classified one character at a time.
+                    raise TypeError("reviews has to be a list of strings")
+                return {"id": request.get("id"), "labels": await self.classify(request["reviews"])}
+
+            labels = await self.classify([request["review"]])
+            return {"id": request.get("id"), "label": labels[0]}
+
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            return {"error": "bad request: {}".format(error)}
+
+    async def handle(self, reader, writer):
+        """
+        Serve one connection, one request per line.
+        """
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                if not line.strip():
+                    continue
+
+                response = await self.respond(line)
+                writer.write((json.dumps(response) + "\n").encode("utf-8"))
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass    # A broken or oversized request ends the connection, not the server.
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, unixPath=None):
+        """
+        Listen on a Unix socket if unixPath is given, otherwise on host:port, until cancelled.
+        """
+
+        self.queue = asyncio.Queue()
+        tasks = [asyncio.create_task(self.batcher())]
+
+        if self.reloader is not None:
+            tasks.append(asyncio.create_task(self.watcher()))
+
+        if unixPath is not None:
+            server = await asyncio.start_unix_server(self.handle, path=unixPath, limit=READ_LIMIT)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, limit=READ_LIMIT)
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+def serve(model, host="127.0.0.1", port=8765, unixPath=None, maxBatch=1024, defaultClass=None, reloader=None):
+    """
+    Run a classification server for the model until interrupted, with the newest model of the reloader if there is one.
+    """
+
+    try:
+        asyncio.run(ClassificationServer(model, maxBatch, defaultClass, reloader).serve(host, port, unixPath))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,141 @@
+"""
+Opening the files the programs read and write.
+
+A path of '-' is stdin or stdout, so the programs can run as stages of a shell pipeline. A compressed input is
+recognised by its first bytes and decompressed as it is read: gzip, bz2 and xz with the standard library, and
+zstd if the zstandard package is installed. An output is compressed the same ways when its name ends in .gz, .bz2,
+.xz or .zst. Reads and writes go through 1MB buffers.
+
+Some inputs have to be plain files: --workers splits the file into byte ranges and seeks to them, the corpus cache
+hashes the file before it reads it, and a binary decision list is memory mapped. isPlainFile() tells them apart.
+
+replacing() writes a file under a temporary name and renames it over the old one at the end, so a program that
+reads the file while it is being written gets the old one or the new one, never half of it.
+"""
+
+import bz2
+import contextlib
+import gzip
+import io
+import lzma
+import os
+import sys
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+STDIO = "-"
+BUFFER = 1 << 20    # 1MB reads and writes
+
+MAGIC_BYTES = 6 # Enough to tell the formats apart.
+
+def openZstd(source, mode):
+    if zstandard is None:
+        raise ValueError("install the zstandard package to read or write zstd compressed files")
+    return zstandard.open(source, mode)
+
+# Each open() takes a path or a binary stream and a mode, and gives the decompressed (or compressing) binary stream.
+DECOMPRESSORS = [(b"\x1f\x8b", gzip.open), (b"BZh", bz2.open), (b"\xfd7zXZ\x00", lzma.open), (b"\x28\xb5\x2f\xfd", openZstd)] # (first bytes, open)
+COMPRESSORS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open, ".zst": openZstd}    # suffix -> open
+
+def isStdio(path):
+    return path == STDIO
+
+def openBinaryInput(path):
+    """
+    The raw bytes of path (or stdin), buffered so the first bytes can be peeked at.
+    """
+
+    if isStdio(path):
+        return open(sys.stdin.fileno(), "rb", buffering=BUFFER, closefd=False)
+
+    return open(path, "rb", buffering=BUFFER)
+
+def decompressor(stream):
+    """
+    The open() that decompresses the stream, None if it is not compressed.
+    """
+
+    head = stream.peek(MAGIC_BYTES)[:MAGIC_BYTES]
+
+    for magic, opener in DECOMPRESSORS:
+        if head.startswith(magic):
+            return opener
+
+    return None
+
+def isPlainFile(path):
+    """
+    Whether path is an uncompressed file that can be seeked, hashed and memory mapped (not stdin).
+    """
+
+    if isStdio(path):
+        return False
+
+    with openBinaryInput(path) as stream:
+        return decompressor(stream) is None
+
+def openInput(path):
+    """
+    Open path (or stdin for '-') for reading text, decompressing it if it is compressed.
+    """
+
+    stream = openBinaryInput(path)
+    opener = decompressor(stream)
+
+    if opener is not None:
+        if not isStdio(path):   # Reopened by name, so closing the decompressor closes the file too.
+            stream.close()
+            stream = path
+        stream = io.BufferedReader(opener(stream, "rb"), BUFFER)
+
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+def openOutput(path):
+    """
+    Open path (or stdout for '-') for writing text, compressed if its name ends in one of the COMPRESSORS suffixes.
+    The file is written from the start, whatever was in it before is gone.
+    """
+
+    if isStdio(path):
+        sys.__stdout__.flush()  # Anything printed so far goes first.
+        return open(sys.__stdout__.fileno(), "w", buffering=BUFFER, encoding="utf-8", closefd=False)
+
+    opener = COMPRESSORS.get(os.path.splitext(path)[1])
+
+    if opener is None:
+        return open(path, "w", buffering=BUFFER, encoding="utf-8")
+
+    return io.TextIOWrapper(io.BufferedWriter(opener(path, "wb"), BUFFER), encoding="utf-8")
+
+def reportStream(outputPath):
+    """
+    Where a program prints its report: stderr if its output goes to stdout, so the two do not mix.
+    """
+
+    return sys.stderr if isStdio(outputPath) else sys.stdout
+
+@contextlib.contextmanager
+def replacing(path):
+    """
+    Yield the name of a temporary file next to path to write to, and rename it over path when the block ends.
+    If the block fails, the temporary file is deleted and path is left as it was. stdout ('-') and special files
+    (/dev/null, pipes) cannot be renamed over and are written directly.
+    """
+
+    if isStdio(path) or (os.path.exists(path) and not os.path.isfile(path)):
+        yield path
+        return
+
+    suffix = os.path.splitext(path)[1]
+    temporary = "{}.tmp{}{}".format(path, os.getpid(), suffix if suffix in COMPRESSORS else "")    # Keeps the suffix openOutput() compresses by
+
+    try:
+        yield temporary
+        os.replace(temporary, path) # Atomic on the same file system
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temporary)
+        raise
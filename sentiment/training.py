@@ -0,0 +1,159 @@
+"""
+Training a decision list from the n-gram counts.
+
+classify() gives every n-gram the class it was counted in more, createDecisionList() scores it with the smoothed
+log ratio of its counts and sortDecisionList() puts the rules in rank order, highest score first. scoreCounts() runs
+the three, or the same steps on NumPy arrays (sentiment.scoring) when NumPy is installed. writeSortedList() writes
+the rules in the text or binary format of sentiment.listfile.
+
+decision-list-train.py and sentiment.model.DecisionListModel.fit() both train with these.
+"""
+
+import math
+
+from sentiment import listfile, preprocess, profiling, scoring
+from sentiment.counts import priorClass
+
+@profiling.timed("classify")
+def classify(wordList, ngrams, tieClass=1):
+    """
+    Classify will assign the unigram or bigram to their respected class.
+    If 'the' appears more in positive than negative, then assign it to be positive.
+    If 'the' appears more in negative than positive, then assign it to be negative.
+    If 'the' does not appear more in positive or negative, then assign it tieClass (the prior class of the counts),
+    so every run over the same reviews gives the same list.
+    """
+
+    positive = ngrams['pos']
+    negative = ngrams['neg']
+
+    result = {}
+
+    for word in wordList:
+
+        if word not in positive:    # If word not in positive, assign it negative
+            result[word] = 0
+            continue
+
+        if word not in negative:    # If word not in negative, assign it positive
+            result[word] = 1
+            continue
+        
+        if(positive[word] > negative[word]):    # If word appears more in positive than negative, assign it to positive.
+            result[word] = 1
+        elif (positive[word] < negative[word]): # If word appears more in negative than positive, assign it to negative.
+            result[word] = 0
+        else:
+            result[word] = tieClass # The counts say nothing, so it gets the class the counts have more of.
+    
+    return result
+
+def countLength(id, ngrams):
+    """
+    CountLength will return the total of words within all positive or negative reviews
+    """
+
+    count = 0
+
+    for word, value in ngrams[id].items():
+        count += value
+
+    return count
+
+@profiling.timed("createDecisionList")
+def createDecisionList(ngrams, review, posVocabLength, negVocabLength, reviewVocabLength, masterClassified, smoothing=1):
+    """
+    CreateDecisionList does that. It will calcualte the absolute log function of the positive and negative probability.
+
+    abs(log2(P(good | positive) / P(good | negative)))
+
+    Every count is smoothed by adding smoothing (1 by default).
+
+    """
+
+    positive = ngrams['pos']
+    negative = ngrams['neg']
+
+    discussionList = {}
+
+    for word in review:
+        
+        if word in positive:
+            x = ngrams["pos"][word] + smoothing # If the word appears in the positive dictionary, then get the count and add 1
+        else: 
+            x = smoothing   # If the word does not exist in the positive dictionary, then 0 + 1
+
+        if word in negative:
+            y = ngrams["neg"][word] + smoothing # If the word appears in the negative dictionary, then get the count and add 1
+        else:
+            y = smoothing    # If the word does not exist in the negative dictionary, then 0 + 1
+
+        # reviewVocabLength is the |V| of unique words for smoothing
+
+        p = (x / (posVocabLength + smoothing * abs(reviewVocabLength))) # P(good | positive)
+        p1 = (y / (negVocabLength + smoothing * abs(reviewVocabLength)))    # P(good | negative)
+        
+        value = abs(math.log2(p/p1))
+
+        discussionList[word] = {"val": value, "class": masterClassified[word]}  # Create and return the discussion list
+
+    return discussionList
+
+def writeListToFile(discussionList, filepath="sentiment-decision-list.txt", fileFormat="text", features=preprocess.DEFAULT_FEATURES):
+    """
+    WriteListToFile will output the discussion list to the sentiment-decision-list.txt as JSON data.
+    With fileFormat "binary" the list is written in the memory mapped format from sentiment.listfile instead.
+    """
+
+    writeSortedList(sortDecisionList(discussionList), filepath, fileFormat, features)
+
+@profiling.timed("sortDecisionList")
+def sortDecisionList(discussionList):
+    """
+    Turn the discussion list into (word, class, score) rows, sorted from the highest to the lowest score.
+    """
+
+    sortedDiscussionList = sorted(discussionList.items(), key=lambda x: (-x[1]["val"], x[0]))  # We must sort the discussion list based on the Log value we computed, ties go in word order
+
+    return [(word, value["class"], value["val"]) for word, value in sortedDiscussionList]
+
+def writeSortedList(rows, filepath="sentiment-decision-list.txt", fileFormat="text", features=preprocess.DEFAULT_FEATURES, defaultClass=None, priorClass=None, stamp=None):
+    """
+    Write an already sorted decision list of (word, class, score) rows to the file.
+    Features other than the default unigrams and bigrams, the default class of a pruned list and the prior class
+    are recorded so the classifier can do the same, and answer the reviews no rule matches.
+    The list is stamped with stamp (the time it is written if there is none) and replaces the old file in one rename.
+    """
+
+    with profiling.stage("writeListToFile"):
+        if fileFormat == "binary":
+            listfile.writeBinaryList(rows, filepath, features, defaultClass, priorClass, stamp)
+        else:
+            listfile.writeTextList(rows, filepath, features, defaultClass, priorClass, stamp)  # Replaces the list of a previous run
+
+    profiling.items("writeListToFile", len(rows))
+
+def scoreCounts(ngrams, reviewVocab, lengths, smoothing=1, useNumpy=True):
+    """
+    The decision list of the counts as (word, class, score) rows, sorted from the highest to the lowest score.
+    reviewVocab is the sorted vocabulary of the counts and lengths the total count of each class.
+    """
+
+    posVocabLength = lengths["pos"] # Get the total number of positive vocab
+    negVocabLength = lengths["neg"] # Get the total number of negative vocab
+
+    if useNumpy and scoring.numpy is not None:
+        with profiling.stage("createDecisionList"):
+            rows = scoring.decisionListRows(ngrams, reviewVocab, posVocabLength, negVocabLength, smoothing)   # Classify, score and sort every word at once with NumPy
+    else:
+        reviewVocabLength = len(reviewVocab)    # Get the length of unique words
+
+        masterClassified = classify(reviewVocab, ngrams, priorClass(lengths))  # Classify a word to be positive or negative depending on how many times it occurs in a review
+
+        disList = createDecisionList(ngrams, reviewVocab, posVocabLength, negVocabLength, reviewVocabLength, masterClassified, smoothing)    # Create the decisionList
+
+        rows = sortDecisionList(disList)    # Sort it from the highest to the lowest log value
+
+    profiling.items("createDecisionList", len(rows))
+
+    return rows
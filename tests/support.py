@@ -0,0 +1,62 @@
+"""
+Shared pieces of the tests: small generated corpora and running the decision-list-*.py programs.
+"""
+
+import os
+import random
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = ["good", "bad", "great", "dull", "plot", "film", "acting", "not", "the", ".", ",", "!", "fine", "boring"]
+
+def writeCorpus(filepath, reviews=300, reviewLength=20, seed=0):
+    """
+    Write a training file of random labelled reviews, over so few words that many n-grams are counted as often in
+    both classes.
+    """
+
+    rng = random.Random(seed)
+
+    with open(filepath, "w") as f:
+        for i in range(reviews):
+            f.write("cv{}_tr.txt {} {}\n".format(i, rng.randint(0, 1), " ".join(rng.choices(WORDS, k=reviewLength))))
+
+    return filepath
+
+def runProgram(filename, *args, cwd=None):
+
+    return subprocess.run([sys.executable, os.path.join(ROOT, filename)] + [str(arg) for arg in args], cwd=cwd, capture_output=True, text=True)
+
+def runScript(filename, *args, cwd=None):
+    """
+    Run one of the programs, fails the test if it exits with an error. Returns its stdout.
+    """
+
+    result = runProgram(filename, *args, cwd=cwd)
+
+    if result.returncode != 0:
+        raise AssertionError("{} failed:\n{}".format(filename, result.stderr))
+
+    return result.stdout
+
+def scriptError(filename, *args, cwd=None):
+    """
+    Run one of the programs, fails the test unless it exits with an error. Returns its stderr.
+    """
+
+    result = runProgram(filename, *args, cwd=cwd)
+
+    if result.returncode == 0:
+        raise AssertionError("{} did not fail".format(filename))
+
+    return result.stderr
+
+def readList(filepath):
+    """
+    The lines of a text decision list without its version stamp, which is new every time a list is written.
+    """
+
+    with open(filepath, "rb") as f:
+        return [line for line in f if not line.startswith(b"#version")]
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from support import writeCorpus, runScript
+
+class ClassifyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.decisionList = os.path.join(self.directory.name, "list.txt")
+        self.reviews = os.path.join(self.directory.name, "test.txt")
+
+        runScript("decision-list-train.py", writeCorpus(os.path.join(self.directory.name, "train.txt")), "--output", self.decisionList)
+
+        with open(writeCorpus(os.path.join(self.directory.name, "unlabelled.txt"), reviews=500, seed=3)) as f, open(self.reviews, "w") as test:
+            for line in f:
+                filename, label, text = line.split(" ", 2)
+                test.write("{} __ {}".format(filename, text))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def classify(self, name, *args):
+        output = os.path.join(self.directory.name, name)
+        runScript("decision-list-test.py", self.decisionList, self.reviews, "--output", output, *args, cwd=self.directory.name)
+        with open(output) as f:
+            return f.read()
+
+    def test_workers_match_serial(self):
+        self.assertEqual(self.classify("serial.txt"), self.classify("workers.txt", "--workers", 4))
+
+    def test_workers_match_serial_with_reset_scope(self):
+        self.assertEqual(self.classify("serial.txt", "--reset-not-scope"), self.classify("workers.txt", "--workers", 4, "--reset-not-scope"))
+
+class EngineTest(unittest.TestCase):
+    """
+    Every engine gives the same answers and explanations as classify, on reviews that all end in a 'not', so the
+    scope crosses every chunk boundary of the parallel engine.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.decisionList = os.path.join(self.directory.name, "list.txt")
+        self.reviews = os.path.join(self.directory.name, "test.txt")
+
+        runScript("decision-list-train.py", writeCorpus(os.path.join(self.directory.name, "train.txt")), "--output", self.decisionList)
+
+        with open(writeCorpus(os.path.join(self.directory.name, "unlabelled.txt"), reviews=200, seed=5)) as f, open(self.reviews, "w") as test:
+            for line in f:
+                filename, label, text = line.split(" ", 2)
+                test.write("{} __ {} not\n".format(filename, text.rstrip("\n")))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def classify(self, name, *args):
+        answers = os.path.join(self.directory.name, name + ".answers")
+        explanations = os.path.join(self.directory.name, name + ".explained")
+        runScript("decision-list-test.py", self.decisionList, self.reviews, "--output", answers, "--explain", explanations, *args, cwd=self.directory.name)
+        with open(answers) as a, open(explanations) as e:
+            return a.read(), e.read()
+
+    def assertEngines(self, *args):
+        expected = self.classify("index", *args)
+
+        for name, engine in [("automaton", ["--matcher", "automaton"]), ("batch", ["--batch-size", 7]), ("parallel", ["--workers", 3]), ("parallel-automaton", ["--workers", 3, "--matcher", "automaton"])]:
+            with self.subTest(engine=name):
+                self.assertEqual(self.classify(name, *(list(args) + engine)), expected)
+
+    def test_engines_match_classify(self):
+        self.assertEngines()
+
+    def test_engines_match_classify_with_reset_scope(self):
+        self.assertEngines("--reset-not-scope")
+
+if __name__ == "__main__":
+    unittest.main()
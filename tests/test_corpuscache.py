@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from support import writeCorpus
+
+from sentiment import corpuscache, preprocess
+
+class CorpusCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cacheDirectory = os.path.join(self.directory.name, "cache")
+        self.corpus = writeCorpus(os.path.join(self.directory.name, "train.txt"), reviews=100)
+
+        with open(self.corpus, "a") as f:   # The not handling is still on at the end of the file.
+            f.write("cv100_tr.txt 1 good film , not\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assertMatchesPreprocess(self, cache, mode, resetScope, features):
+        expected = list(preprocess.preProcessFlags(self.corpus, mode, resetScope, features))
+
+        for run in ("miss", "hit"):
+            with self.subTest(run=run, mode=mode, resetScope=resetScope, features=features):
+                corpus = cache.corpus(self.corpus, mode, resetScope, features)
+                self.assertEqual(list(corpus), [review for review, flag in expected])
+                self.assertEqual(corpus.notHandlingFlag, expected[-1][1])
+                corpus.close()
+
+    def test_hit_matches_preprocess(self):
+        cache = corpuscache.CorpusCache(self.cacheDirectory)
+
+        self.assertMatchesPreprocess(cache, preprocess.TRAIN, False, preprocess.DEFAULT_FEATURES)
+        self.assertMatchesPreprocess(cache, preprocess.TRAIN, True, preprocess.DEFAULT_FEATURES)
+        self.assertMatchesPreprocess(cache, preprocess.TEST, False, preprocess.Features(order=3, hashBits=12))
+
+        self.assertEqual(len(os.listdir(self.cacheDirectory)), 3)
+
+    def test_key_changes_with_file_and_settings(self):
+        cache = corpuscache.CorpusCache(self.cacheDirectory)
+        features = preprocess.DEFAULT_FEATURES
+
+        paths = {
+            cache.path(self.corpus, preprocess.TRAIN, False, features),
+            cache.path(self.corpus, preprocess.TEST, False, features),
+            cache.path(self.corpus, preprocess.TRAIN, True, features),
+            cache.path(self.corpus, preprocess.TRAIN, False, features._replace(order=1)),
+            cache.path(self.corpus, preprocess.TRAIN, False, features._replace(hashBits=16)),
+        }
+        self.assertEqual(len(paths), 5)
+
+        before = cache.path(self.corpus, preprocess.TRAIN, False, features)
+        with open(self.corpus, "a") as f:
+            f.write("cv101_tr.txt 0 dull\n")
+        self.assertNotEqual(cache.path(self.corpus, preprocess.TRAIN, False, features), before)
+
+    def test_evict_keeps_the_entry_in_use(self):
+        cache = corpuscache.CorpusCache(self.cacheDirectory)
+        orders = [preprocess.Features(order=order, hashBits=None) for order in (1, 2, 3)]
+
+        for features in orders:
+            cache.corpus(self.corpus, features=features).close()
+
+        cache.maxBytes = 1  # Smaller than any entry.
+        keep = cache.path(self.corpus, preprocess.TRAIN, False, orders[1])
+        cache.evict(keep=keep)
+
+        self.assertEqual(os.listdir(self.cacheDirectory), [os.path.basename(keep)])
+
+        cache.corpus(self.corpus, features=orders[0]).close()   # A new entry, the only one left after it is cached
+        self.assertEqual(os.listdir(self.cacheDirectory), [os.path.basename(cache.path(self.corpus, preprocess.TRAIN, False, orders[0]))])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+
+from sentiment import evaluation
+
+class EvaluationTest(unittest.TestCase):
+
+    def test_missing_and_extra(self):
+        gold = {"a.txt": 1, "b.txt": 0, "c.txt": 1}
+        answers = [("b.txt", 0), ("d.txt", 1), ("a.txt", 0), ("b.txt", 1)]   # d.txt is not in the gold file, b.txt is answered twice
+
+        scores = evaluation.evaluate(gold, answers)
+
+        self.assertEqual((scores.answered, scores.missing, scores.extra), (2, 1, 2))
+        self.assertEqual((scores.trueNegative, scores.falseNegative), (1, 1))
+        self.assertEqual(scores.accuracy, 0.5)
+
+    def test_scored_rows(self):
+        with tempfile.TemporaryDirectory() as directory:
+            goldPath = os.path.join(directory, "gold.txt")
+            answersPath = os.path.join(directory, "answers.txt")
+            scoredPath = os.path.join(directory, "scored.txt")
+
+            with open(goldPath, "w") as f:
+                f.write("a.txt 1\nb.txt 0\nc.txt 1\n")
+
+            with open(answersPath, "w") as f:   # In another order than the gold file.
+                f.write("b.txt 0\nd.txt 1\na.txt 1\n")
+
+            scores = evaluation.evaluateFiles(goldPath, answersPath, scoredPath)
+
+            with open(scoredPath) as f:
+                rows = f.read().splitlines()
+
+        self.assertEqual(rows[:4], ["b.txt 0 | b.txt 0 | True", "d.txt | d.txt 1 | extra", "a.txt 1 | a.txt 1 | True", "c.txt 1 | c.txt | missing"])
+        self.assertIn("Missing: 1", rows)
+        self.assertIn("Extra: 1", rows)
+        self.assertEqual(scores.accuracy, 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
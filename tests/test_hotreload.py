@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+from sentiment import streams
+from sentiment.hotreload import ModelReloader
+from sentiment.model import DecisionListModel
+
+OLD_RULES = [["good", 1, 2.0], ["dull", 0, 1.0]]
+NEW_RULES = [["good", 0, 2.0], ["dull", 1, 1.0]]    # The same rules, the other way around.
+
+class HotReloadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def publish(self, rules, fileFormat):
+        filepath = os.path.join(self.directory.name, "list." + ("bin" if fileFormat == "binary" else "txt"))
+        DecisionListModel(rules, priorClass=1).save(filepath, fileFormat)   # Renamed over the old file by streams.replacing
+        return filepath
+
+    def test_new_version_is_picked_up(self):
+        for fileFormat in ("text", "binary"):
+            with self.subTest(fileFormat=fileFormat):
+                filepath = self.publish(OLD_RULES, fileFormat)
+                reloader = ModelReloader(filepath)
+
+                old = reloader.model    # A reader holding the old model
+                self.assertFalse(reloader.check())
+
+                self.publish(NEW_RULES, fileFormat)
+
+                self.assertTrue(reloader.check())
+                self.assertEqual(reloader.reloads, 1)
+                self.assertEqual(reloader.model.predict(["good", "dull"]), [0, 1])
+                self.assertEqual(old.predict(["good", "dull"]), [1, 0])  # The old model still works on the replaced file.
+                self.assertFalse(reloader.check())
+
+                old.close()
+                reloader.model.close()
+
+    def test_half_written_file_is_never_loaded(self):
+        for fileFormat in ("text", "binary"):
+            with self.subTest(fileFormat=fileFormat):
+                filepath = self.publish(OLD_RULES, fileFormat)
+                newPath = os.path.join(self.directory.name, "new")
+                DecisionListModel(NEW_RULES, priorClass=1).save(newPath, fileFormat)
+
+                with open(newPath, "rb") as f:
+                    newList = f.read()
+
+                reloader = ModelReloader(filepath)
+
+                with self.assertRaises(RuntimeError):
+                    with streams.replacing(filepath) as temporary:
+                        with open(temporary, "wb") as f:
+                            f.write(newList[:len(newList) // 2])
+
+                        self.assertFalse(reloader.check())  # Not renamed over the list yet.
+                        raise RuntimeError("the trainer died halfway")
+
+                self.assertFalse(os.path.exists(temporary))
+                self.assertFalse(reloader.check())
+                self.assertEqual(reloader.reloads, 0)
+                self.assertEqual(reloader.model.predict(["good", "dull"]), [1, 0])
+
+                reloader.model.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+from sentiment import listfile
+from sentiment.classifier import openList
+from sentiment.preprocess import Features
+
+RULES = [("#features", 1, 4.0), ("#prior", 0, 3.0), ("#version", 1, 2.5), ("good", 1, 2.0), ("dull", 0, 1.0)]
+
+class TextListTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "list.txt")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_header_tokens_are_rules(self):
+        listfile.writeTextList(RULES, self.path, Features(order=3, hashBits=None), defaultClass=1, priorClass=0, stamp=7)
+
+        self.assertEqual(listfile.readTextList(self.path), RULES)
+        self.assertEqual(openList(self.path), [[rule, str(classVal)] for rule, classVal, score in RULES])
+        self.assertEqual(listfile.readHeader(self.path), (Features(order=3, hashBits=None), 1, 0, 7))
+
+    def test_header_tokens_without_header(self):
+        listfile.writeTextList(RULES, self.path, stamp=7)
+
+        self.assertEqual(listfile.readTextList(self.path)[0], RULES[0])
+        self.assertEqual(listfile.readHeader(self.path), (listfile.DEFAULT_FEATURES, None, None, 7))
+
+    def test_is_header(self):
+        self.assertTrue(listfile.isHeader(["#features", "order=3", "hashBits=18"]))
+        self.assertTrue(listfile.isHeader(["#prior", "1"]))
+        self.assertFalse(listfile.isHeader(["#features", "1", "4.0"]))
+        self.assertFalse(listfile.isHeader(["#features"]))
+
+class BinaryListTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "list.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        listfile.writeBinaryList(RULES, self.path, Features(order=3, hashBits=None), defaultClass=None, priorClass=1, stamp=7)
+
+        decisionList = listfile.BinaryDecisionList(self.path)
+        try:
+            self.assertEqual([(decisionList.rule(rank), decisionList.ruleClass(rank), decisionList.score(rank)) for rank in range(len(decisionList))], RULES)
+            self.assertEqual(decisionList.get("good"), 3)
+            self.assertEqual((decisionList.priorClass, decisionList.stamp), (1, 7))
+        finally:
+            decisionList.close()
+
+        self.assertEqual(listfile.readHeader(self.path), (Features(order=3, hashBits=None), None, 1, 7))
+
+    def test_other_version(self):
+        listfile.writeBinaryList(RULES, self.path, stamp=7)
+
+        with open(self.path, "r+b") as f:
+            f.seek(len(listfile.MAGIC))
+            f.write((listfile.VERSION - 1).to_bytes(2, "little"))
+
+        with self.assertRaises(ValueError):
+            listfile.readHeader(self.path)
+        with self.assertRaises(ValueError):
+            listfile.BinaryDecisionList(self.path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+from support import writeCorpus
+
+from sentiment.model import DecisionListModel
+from sentiment.predictioncache import PredictionCache
+
+class ModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.corpus = writeCorpus(os.path.join(self.directory.name, "train.txt"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_fit_skips_blank_lines(self):
+        with open(self.corpus) as f:
+            lines = f.readlines()
+
+        with open(self.corpus, "a") as f:
+            f.write("\n   \n")
+
+        with open(self.corpus) as f:
+            model = DecisionListModel().fit(f)
+
+        self.assertEqual(model.decisionList, DecisionListModel().fit(lines).decisionList)
+
+    def test_fit_pairs(self):
+        model = DecisionListModel().fit([("a good film .", 1), ("a dull film .", 0), ("", 1)])
+
+        self.assertEqual(model.predict(["good", "dull"]), [1, 0])
+
+    def test_predict_blank_reviews(self):
+        model = DecisionListModel([["good", 1, 2.0], ["dull", 0, 1.0]], priorClass=1)
+
+        self.assertEqual(model.predict(["dull .", "", "good .\n", "\n"]), [0, 1, 1, 1])    # A blank review gets the prior class.
+        self.assertEqual(model.predict(["dull .", ""], defaultClass=0), [0, 0])
+        self.assertEqual(model.predict_one(""), 1)
+
+        model.cache = PredictionCache()
+        self.assertEqual(model.predict(["\n", "dull .", "dull ."]), [1, 0, 0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from sentiment import preprocess
+from sentiment.counts import countFile
+
+class NotHandlingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, lines):
+        path = os.path.join(self.directory.name, "reviews.txt")
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def test_review_ending_in_not(self):
+        review = ["cv1.txt", "it", "was", "not", "good"]
+
+        self.assertTrue(preprocess.notHandlingReview(review))
+        self.assertEqual(review, ["cv1.txt", "it", "was", "not", "not_good"])
+
+        review = ["cv2.txt", "dull", ".", "fine"]
+
+        self.assertFalse(preprocess.notHandlingReview(review, True))
+        self.assertEqual(review, ["cv2.txt", "not_dull", ".", "fine"])
+
+    def test_filename_after_open_not(self):
+        path = self.write(["cv1.txt __ it was not good", "cv2.txt __ dull film"])
+
+        reviews = list(preprocess.preProcess(path, preprocess.TEST))
+
+        self.assertEqual([review[0] for review in reviews], ["cv1.txt", "cv2.txt"])
+        self.assertEqual(reviews[1][1:3], ["not_dull", "not_film"])
+
+    def test_label_after_open_not(self):
+        path = self.write(["cv1.txt 1 it was not good", "cv2.txt 0 dull film"])
+
+        reviews = list(preprocess.preProcess(path, preprocess.TRAIN))
+        ngrams, notHandlingFlag = countFile(path)
+
+        self.assertEqual([review[0] for review in reviews], ["1", "0"])
+        self.assertEqual(ngrams["neg"].get("not_dull"), 1)
+        self.assertNotIn("not_dull", ngrams["pos"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from support import WORDS, runScript
+
+from sentiment import crossval, pruning
+
+class FallbackTest(unittest.TestCase):
+    """
+    With no --default-class, a review no kept rule matches gets the prior class, in the report as in the model.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.corpus = os.path.join(self.directory.name, "train.txt")
+
+        with open(self.corpus, "w") as f:  # Only positive reviews, so the prior class is 1 in every fold.
+            for i in range(50):
+                f.write("cv{}_tr.txt 1 {}\n".format(i, " ".join(WORDS[i % len(WORDS):] + WORDS[:i % len(WORDS)])))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_crossval_uses_the_fold_prior(self):
+        levels = [("everything pruned", pruning.NO_PRUNING._replace(minCount=10 ** 9))]
+
+        (smoothing, prune, rules, coverage, accuracy), = crossval.crossValidate(self.corpus, 5, levels=levels)
+        self.assertEqual((rules, coverage, accuracy), (0, 0, 1))
+
+        (smoothing, prune, rules, coverage, accuracy), = crossval.crossValidate(self.corpus, 5, levels=levels, defaultClass=0)
+        self.assertEqual(accuracy, 0)
+
+    def test_report_uses_the_prior(self):
+        heldOut = os.path.join(self.directory.name, "heldout.txt")
+
+        with open(heldOut, "w") as f:  # No word of the training file, no rule matches.
+            f.write("cv0_tr.txt 1 unseen words\ncv1_tr.txt 1 other words\n")
+
+        report = runScript("decision-list-train.py", self.corpus, "--output", os.path.join(self.directory.name, "list.txt"), "--prune-report", heldOut, cwd=self.directory.name)
+        none = next(line.split() for line in report.splitlines() if line.startswith("none"))
+
+        self.assertEqual(none[2:], ["0.0000", "1.0000"])
+
+if __name__ == "__main__":
+    unittest.main()
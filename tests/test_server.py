@@ -0,0 +1,38 @@
+import asyncio
+import json
+import unittest
+
+from sentiment.model import DecisionListModel
+from sentiment.server import ClassificationServer
+
+class ServerTest(unittest.TestCase):
+
+    def respond(self, request):
+        """
+        The server's answer to one request line.
+        """
+
+        server = ClassificationServer(DecisionListModel([["good", 1, 2.0], ["dull", 0, 1.0]], priorClass=1))
+
+        async def run():
+            server.queue = asyncio.Queue()
+            batcher = asyncio.create_task(server.batcher())
+            try:
+                return await server.respond(json.dumps(request))
+            finally:
+                batcher.cancel()
+
+        return asyncio.run(run())
+
+    def test_review(self):
+        self.assertEqual(self.respond({"id": 1, "review": "a dull film ."}), {"id": 1, "label": 0})
+
+    def test_reviews(self):
+        self.assertEqual(self.respond({"id": 2, "reviews": ["good .", "dull .", "a film ."]}), {"id": 2, "labels": [1, 0, 1]})
+
+    def test_reviews_must_be_a_list(self):
+        self.assertIn("bad request", self.respond({"id": 3, "reviews": "great movie"})["error"])
+        self.assertIn("bad request", self.respond({"id": 4, "reviews": [1, 2]})["error"])
+
+if __name__ == "__main__":
+    unittest.main()
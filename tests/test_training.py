@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from support import writeCorpus, runScript, scriptError, readList
+
+class TrainingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.corpus = writeCorpus(os.path.join(self.directory.name, "train.txt"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def train(self, name, *args):
+        output = os.path.join(self.directory.name, name)
+        runScript("decision-list-train.py", self.corpus, "--output", output, *args, cwd=self.directory.name)
+        return readList(output)
+
+    def test_serial_runs_are_identical(self):
+        self.assertEqual(self.train("a.txt"), self.train("b.txt"))
+
+    def test_workers_match_serial(self):
+        self.assertEqual(self.train("serial.txt"), self.train("workers.txt", "--workers", 4))
+
+    def test_python_scoring_matches_numpy(self):
+        self.assertEqual(self.train("numpy.txt"), self.train("python.txt", "--no-numpy"))
+
+    def test_update_matches_full_retrain(self):
+        first = writeCorpus(os.path.join(self.directory.name, "first.txt"), seed=1)
+        second = writeCorpus(os.path.join(self.directory.name, "second.txt"), seed=2)
+        snapshot = os.path.join(self.directory.name, "counts.json")
+
+        with open(self.corpus, "w") as f:
+            f.write(open(first).read() + open(second).read())
+
+        runScript("decision-list-train.py", first, "--snapshot", snapshot, "--order", 3, "--reset-not-scope", cwd=self.directory.name)
+        updated = os.path.join(self.directory.name, "updated.txt")
+        runScript("decision-list-train.py", second, "--snapshot", snapshot, "--update", "--output", updated, cwd=self.directory.name)
+
+        self.assertEqual(readList(updated), self.train("full.txt", "--order", 3, "--reset-not-scope"))
+
+    def test_update_rejects_other_settings(self):
+        snapshot = os.path.join(self.directory.name, "counts.json")
+        runScript("decision-list-train.py", self.corpus, "--snapshot", snapshot, cwd=self.directory.name)
+
+        for option in (["--reset-not-scope"], ["--order", 3], ["--hash-bits", 16]):
+            self.assertIn("the snapshot was counted", scriptError("decision-list-train.py", self.corpus, "--snapshot", snapshot, "--update", *option, cwd=self.directory.name))
+
+    def test_cache_dir_rejects_workers(self):
+        self.assertIn("--workers", scriptError("decision-list-train.py", self.corpus, "--cache-dir", self.directory.name, "--workers", 2, cwd=self.directory.name))
+
+if __name__ == "__main__":
+    unittest.main()